@@ -0,0 +1,312 @@
+import argparse
+import atexit
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Scaling benchmark for ml/src/data/data_processing.py. Every size runs in
+# its own subprocess and scratch directory: synthetic raw rows are written
+# to a scratch CSV that main() reads instead of data.source (and writes its
+# output next to, not to ml/data/processed), end to end with
+# PIPELINE_PROFILE=1 and the per-function numbers of ml/src/profiling.py
+# (wall, CPU, peak RSS, rows) are appended to a JSON lines file together
+# with the git revision, so runs from different commits can be compared.
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+RESULTS_PATH = os.path.join(BENCH_DIR, "processing_results.jsonl")
+RAW_CSV = os.path.join("ml", "data", "raw", "fights_dataset_with_stats.csv")
+
+# Functions that only transform frames in memory.
+PROCESSING_FUNCTIONS = [
+    "drop_nas", "height_processing", "weight_processing", "reach_processing", "age_processing",
+    "career_stats_processing", "stance_processing", "data_preprocessing", "feature_engineering",
+]
+REPORT_FUNCTIONS = ["load_data", *PROCESSING_FUNCTIONS, "save_data", "main"]
+# Calibrated on this benchmark: the vectorised steps cost 0.2 (stance) to
+# 6.5 (drop_nas, pandas string methods) us per row up to 100k rows, the
+# iterrows/.at loops 34 and up, so the limit sits between the two groups.
+MAX_US_PER_ROW = 20.0
+# Slope of log(time) over log(rows) between the smallest and largest size.
+# Linear work stays near 1 (lower while fixed overhead dominates); growth
+# well above it means something superlinear, e.g. quadratic concatenation.
+MAX_EXPONENT = 1.5
+# Functions faster than this at the largest size are too noisy to judge.
+MIN_EXPONENT_WALL_S = 0.5
+
+MONTHS = np.array(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])
+STANCES = np.array(["Orthodox", "Southpaw", "Switch", "Open Stance"])
+STANCE_WEIGHTS = [0.75, 0.19, 0.055, 0.005]
+WEIGHTS = np.array([115, 125, 135, 145, 155, 170, 185, 205, 265])
+
+
+def percent(rng: np.random.Generator, low: int, high: int, n: int):
+    return pd.Series(rng.integers(low, high + 1, n)).astype(str) + "%"
+
+
+def fighter_columns(rng: np.random.Generator, n: int, suffix: str):
+    height = rng.integers(62, 81, n)
+    dob_year = rng.integers(1965, 2003, n)
+    columns = {
+        f"height{suffix}": pd.Series(height // 12).astype(str) + "' " + pd.Series(height % 12).astype(str) + '"',
+        f"weight{suffix}": pd.Series(rng.choice(WEIGHTS, n)).astype(str) + " lbs.",
+        f"reach{suffix}": pd.Series(height + rng.integers(-3, 6, n)).astype(str) + '"',
+        f"stance{suffix}": pd.Series(rng.choice(STANCES, n, p=STANCE_WEIGHTS)),
+        f"dob{suffix}": (pd.Series(rng.choice(MONTHS, n)) + " " + pd.Series(rng.integers(1, 29, n)).map("{:02d}".format)
+                         + ", " + pd.Series(dob_year).astype(str)),
+        f"slpm{suffix}": rng.uniform(0.5, 8, n).round(2),
+        f"stracc{suffix}": percent(rng, 20, 75, n),
+        f"sapm{suffix}": rng.uniform(0.5, 7, n).round(2),
+        f"strdef{suffix}": percent(rng, 30, 75, n),
+        f"tdavg{suffix}": rng.uniform(0, 6, n).round(2),
+        f"tdacc{suffix}": percent(rng, 0, 100, n),
+        f"tddef{suffix}": percent(rng, 0, 100, n),
+        f"subavg{suffix}": rng.uniform(0, 3, n).round(1),
+    }
+
+    # Missing values as they show up on ufcstats: fighters without a profile
+    # ("--" everywhere), missing reach or DOB only, and zero strike rates.
+    no_profile = rng.random(n) < 0.002
+    for col in (f"height{suffix}", f"weight{suffix}", f"reach{suffix}", f"dob{suffix}"):
+        columns[col][no_profile] = "--"
+    columns[f"reach{suffix}"][rng.random(n) < 0.07] = "--"
+    columns[f"dob{suffix}"][rng.random(n) < 0.007] = "--"
+    columns[f"slpm{suffix}"][rng.random(n) < 0.01] = 0.0
+    columns[f"stance{suffix}"][rng.random(n) < 0.005] = np.nan
+    return columns
+
+
+def synthetic_raw(n_rows: int, seed: int = 0):
+    """Rows shaped like ml/data/raw/fights_dataset_with_stats.csv, with the
+    scraped string formats (5' 11", 72", 155 lbs., 45%, Jul 19, 1990)."""
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Fighter {i}" for i in range(max(n_rows // 5, 2))])
+    first = fighter_columns(rng, n_rows, "_1")
+    second = fighter_columns(rng, n_rows, "_2")
+
+    df = pd.DataFrame({
+        "winner": rng.choice(names, n_rows),
+        "looser": rng.choice(names, n_rows),
+        **first,
+        **second,
+        "fight_date": rng.integers(1994, 2026, n_rows).astype(float),
+        "cur_streak_1": rng.integers(0, 10, n_rows).astype(float),
+        "max_streak_1": rng.integers(0, 15, n_rows).astype(float),
+        "cur_streak_2": rng.integers(0, 10, n_rows).astype(float),
+        "max_streak_2": rng.integers(0, 15, n_rows).astype(float),
+        "outcome": rng.integers(0, 2, n_rows).astype(float),
+    })
+    # The scrape repeats a few rows.
+    repeated = n_rows // 1000
+    rows = np.concatenate([np.arange(n_rows - repeated), rng.integers(0, n_rows - repeated, repeated)])
+    return df.iloc[rows].reset_index(drop=True)
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", os.path.join(SRC_DIR, "data")], cwd=BENCH_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return revision, bool(dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def run_size(n_rows: int, seed: int):
+    """Run data_processing.main() on n_rows synthetic rows in a scratch
+    directory. Meant to be called once per process (see run_worker)."""
+    workdir = tempfile.mkdtemp(prefix="processing_benchmark_")
+    # Registered before the profiler's own exit hook, so it runs after it.
+    atexit.register(shutil.rmtree, workdir, True)
+
+    started = time.perf_counter()
+    os.makedirs(os.path.join(workdir, os.path.dirname(RAW_CSV)))
+    synthetic_raw(n_rows, seed).to_csv(os.path.join(workdir, RAW_CSV), index=False)
+    generate_s = time.perf_counter() - started
+
+    # Profiling is configured at import time.
+    os.chdir(workdir)
+    os.environ.update(PIPELINE_PROFILE="1", PIPELINE_PROFILE_DIR=os.path.join(workdir, "profiles"))
+    sys.path.insert(0, os.path.join(SRC_DIR, "data"))
+    import data_processing
+    import profiling
+
+    baseline_rss_mb = profiling.current_rss() / 2**20
+    data_processing.main(os.path.join(workdir, RAW_CSV), os.path.join(workdir, "processed"))
+    stage = profiling.get_stage("data_processing").to_dict()
+
+    functions = {}
+    for name, stats in stage["functions"].items():
+        rows = stats["rows_in"] or n_rows
+        functions[name] = {**stats, "us_per_row": round(stats["wall_s"] / rows * 1e6, 3)}
+    return {
+        "rows": n_rows,
+        "seed": seed,
+        "generate_s": round(generate_s, 3),
+        "baseline_rss_mb": round(baseline_rss_mb, 1),
+        "max_rss_mb": round(stage["max_rss_mb"], 1),
+        "functions": functions,
+    }
+
+
+def run_worker(n_rows: int, seed: int, verbose: bool):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", str(n_rows), "--seed", str(seed)]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=None if verbose else subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{n_rows} rows failed:\n{(result.stderr or '')[-2000:]}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def load_results(path: str):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_run(history: list, record: dict):
+    # Latest run of the same size from another commit.
+    for old in reversed(history):
+        if old["rows"] == record["rows"] and old["git_revision"] != record["git_revision"]:
+            return old
+    return None
+
+
+def marginal_us_per_row(records: list, name: str):
+    # Cost of the extra rows between the smallest and largest size, which
+    # leaves out fixed per-call overhead that dominates small inputs.
+    small, large = records[0]["functions"].get(name), records[-1]["functions"].get(name)
+    if small is None or large is None:
+        return None
+    if len(records) == 1 or large["rows_in"] == small["rows_in"]:
+        return large["us_per_row"]
+    return (large["wall_s"] - small["wall_s"]) / (large["rows_in"] - small["rows_in"]) * 1e6
+
+
+def scaling_exponent(records: list, name: str):
+    small, large = records[0]["functions"].get(name), records[-1]["functions"].get(name)
+    if len(records) == 1 or small is None or large is None or small["wall_s"] <= 0:
+        return None
+    return math.log(large["wall_s"] / small["wall_s"]) / math.log(records[-1]["rows"] / records[0]["rows"])
+
+
+def check(records: list, history: list, max_us_per_row: float, max_exponent: float, threshold: float):
+    problems = []
+    records = sorted(records, key=lambda r: r["rows"])
+    for name in PROCESSING_FUNCTIONS:
+        us_per_row = marginal_us_per_row(records, name)
+        if us_per_row is not None and us_per_row > max_us_per_row:
+            problems.append(f"{name}: {us_per_row:.1f} us per extra row (> {max_us_per_row}), "
+                            f"looks like a per-row Python loop")
+        exponent = scaling_exponent(records, name)
+        if (exponent is not None and exponent > max_exponent
+                and records[-1]["functions"][name]["wall_s"] >= MIN_EXPONENT_WALL_S):
+            problems.append(f"{name}: time grows as rows^{exponent:.2f} (> {max_exponent}), superlinear")
+
+    for record in records:
+        old = previous_run(history, record)
+        if old is None:
+            continue
+        for name, stats in record["functions"].items():
+            before = old["functions"].get(name)
+            if before and before["wall_s"] > 0.05 and stats["wall_s"] / before["wall_s"] - 1 > threshold:
+                problems.append(f"{name} @ {record['rows']:,} rows: {before['wall_s']:.2f}s -> {stats['wall_s']:.2f}s "
+                                f"since {old['git_revision']}")
+    return problems
+
+
+def print_scaling(records: list):
+    records = sorted(records, key=lambda r: r["rows"])
+    header = "".join(f"{r['rows']:>14,}" for r in records)
+    print(f"{'function':<26}{header}{'us/row':>10}{'exponent':>10}")
+    for name in REPORT_FUNCTIONS:
+        stats = [r["functions"].get(name) for r in records]
+        if not any(stats):
+            continue
+        cells = "".join(f"{s['wall_s']:>13.3f}s" if s else f"{'-':>14}" for s in stats)
+        exponent = scaling_exponent(records, name)
+        exponent = "" if exponent is None else f"{exponent:.2f}"
+        print(f"{name:<26}{cells}{stats[-1]['us_per_row'] if stats[-1] else 0:>10.2f}{exponent:>10}")
+    print(f"{'peak RSS (MB)':<26}" + "".join(f"{r['max_rss_mb']:>14.0f}" for r in records))
+
+
+def print_history(history: list):
+    # One scaling row per commit for the full main() path.
+    sizes = sorted({record["rows"] for record in history})
+    print(f"{'revision':<16}{'date':<12}" + "".join(f"{rows:>14,}" for rows in sizes))
+    revisions = {}
+    for record in history:
+        revision = f"{record['git_revision']}{'+dirty' if record['git_dirty'] else ''}"
+        revisions.setdefault(revision, {})[record["rows"]] = record
+    for revision, by_size in revisions.items():
+        date = time.strftime("%Y-%m-%d", time.localtime(max(r["timestamp"] for r in by_size.values())))
+        cells = "".join(
+            f"{by_size[rows]['functions']['main']['wall_s']:>13.2f}s" if rows in by_size else f"{'-':>14}"
+            for rows in sizes
+        )
+        print(f"{revision:<16}{date:<12}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the data processing stage.")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated row counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_PATH, help="JSON lines file the results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="Don't append the results")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit 1 on per-row loops, superlinear scaling or regressions against the previous commit")
+    parser.add_argument("--max-us-per-row", type=float, default=MAX_US_PER_ROW)
+    parser.add_argument("--max-exponent", type=float, default=MAX_EXPONENT)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--history", action="store_true", help="Print main() time per commit and size, then exit")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline logs")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_size(args.worker, args.seed)))
+        return
+
+    history = load_results(args.output)
+    if args.history:
+        print_history(history)
+        return
+
+    revision, dirty = git_revision()
+    environment = {
+        "git_revision": revision,
+        "git_dirty": dirty,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "host": platform.node(),
+    }
+
+    records = []
+    for n_rows in [int(size) for size in args.sizes.split(",")]:
+        print(f"Running {n_rows:,} rows...", file=sys.stderr)
+        record = {**environment, "timestamp": time.time(), **run_worker(n_rows, args.seed, args.verbose)}
+        records.append(record)
+        if not args.no_save:
+            with open(args.output, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    print_scaling(records)
+    problems = check(records, history, args.max_us_per_row, args.max_exponent, args.threshold)
+    for problem in problems:
+        print(problem)
+    if args.check and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "data"))
+import data_ingestion
+from ufcstats_server import FixtureServer, recorded_site, synthetic_site
+
+# Runs the scraper functions from data_ingestion.py end to end against the
+# local fixture server: event list -> event pages -> fighter pages (stats and
+# win streaks). Each phase fans out over a thread pool of the given size,
+# sharing the scraper's session and retry strategy.
+
+
+def run_phase(server: FixtureServer, name: str, func, items: list, concurrency: int):
+    server.reset_stats()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(func, items))
+    elapsed = time.perf_counter() - started
+
+    stats = server.stats()
+    return results, {
+        "phase": name,
+        "pages": len(items),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(items) / elapsed, 1) if elapsed else None,
+        "requests": stats["requests"],
+        "retries": stats["requests"] - stats["pages"],
+        "statuses": stats["statuses"],
+        "failed": len(stats["failed_pages"]),
+    }
+
+
+def run_scrape(server: FixtureServer, concurrency: int):
+    data_ingestion.BASE_URL = server.base_url
+    adapter = HTTPAdapter(max_retries=data_ingestion.retry_strategy, pool_maxsize=concurrency)
+    data_ingestion.session.mount("http://", adapter)
+
+    phases = []
+    started = time.perf_counter()
+    [events], phase = run_phase(server, "events", lambda _: data_ingestion.get_events(), [None], 1)
+    phases.append(phase)
+
+    fights, phase = run_phase(server, "event pages", data_ingestion.get_fights, events, concurrency)
+    phases.append(phase)
+    fights = [fight for event in fights for fight in event]
+
+    opponents = {}
+    for fight in fights:
+        opponents.setdefault(fight["winner_url"], fight["looser"])
+        opponents.setdefault(fight["looser_url"], fight["winner"])
+    urls = sorted(opponents)
+
+    _, phase = run_phase(server, "fighter stats", data_ingestion.get_fighter_info, urls, concurrency)
+    phases.append(phase)
+    _, phase = run_phase(
+        server, "win streaks", lambda url: data_ingestion.get_win_streaks(url, opponents[url]), urls, concurrency
+    )
+    phases.append(phase)
+
+    elapsed = time.perf_counter() - started
+    pages = sum(p["pages"] for p in phases)
+    return {
+        "concurrency": concurrency,
+        "events": len(events),
+        "fights": len(fights),
+        "fighters": len(urls),
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 1),
+        "requests": sum(p["requests"] for p in phases),
+        "retries": sum(p["retries"] for p in phases),
+        "failed": sum(p["failed"] for p in phases),
+        "phases": phases,
+    }
+
+
+def print_result(result: dict):
+    print(
+        f"concurrency {result['concurrency']:>3}: {result['pages']} pages in {result['seconds']:.2f}s "
+        f"({result['pages_per_sec']:.1f} pages/s), {result['requests']} requests, "
+        f"{result['retries']} retries, {result['failed']} failed"
+    )
+    for phase in result["phases"]:
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(phase["statuses"].items()))
+        print(
+            f"    {phase['phase']:<14} {phase['pages']:>5} pages {phase['seconds']:>8.2f}s "
+            f"{phase['pages_per_sec'] or 0:>8.1f}/s  retries {phase['retries']:>4}  failed {phase['failed']:>3}  [{statuses}]"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ufcstats scraper against the offline fixture server.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated thread pool sizes")
+    parser.add_argument("--fixtures", help="Directory of recorded pages; synthetic pages when omitted")
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--fights-per-event", type=int, default=12)
+    parser.add_argument("--fighters", type=int, default=150)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--backoff-factor", type=float, help="Override the scraper's retry backoff factor")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        pages = recorded_site(args.fixtures)
+    else:
+        pages = synthetic_site(args.events, args.fights_per_event, args.fighters, args.seed)
+    if args.backoff_factor is not None:
+        data_ingestion.retry_strategy.backoff_factor = args.backoff_factor
+
+    results = []
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        server = FixtureServer(pages, 0, args.latency_ms, args.error_rate, args.throttle_rate,
+                               args.retry_after, args.seed)
+        server.start()
+        try:
+            result = run_scrape(server, concurrency)
+        finally:
+            server.shutdown()
+            server.server_close()
+        print_result(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
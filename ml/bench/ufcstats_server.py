@@ -0,0 +1,248 @@
+import argparse
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Offline stand-in for ufcstats.com. Pages follow the markup the selectors in
+# ml/src/data/data_ingestion.py expect:
+#   /statistics/events/completed?page=all   event list (first row is upcoming)
+#   /event-details/<id>                     fights of one event
+#   /fighter-details/<id>                   career stats and fight history
+# Pages are generated from a seed, or served from a directory of recorded
+# pages (e.g. `wget -r` of the live site). Absolute links to the live site
+# in recorded pages are rewritten to point at this server.
+LIVE_BASE_URL = "http://www.ufcstats.com"
+ERROR_STATUSES = [500, 502, 503]
+
+FIRST_NAMES = ["Alex", "Islam", "Jon", "Max", "Sean", "Dustin", "Charles", "Israel", "Kamaru", "Leon",
+               "Belal", "Tom", "Ilia", "Merab", "Petr", "Alexandre", "Brandon", "Jiri", "Magomed", "Arman"]
+LAST_NAMES = ["Pereira", "Makhachev", "Jones", "Holloway", "Strickland", "Poirier", "Oliveira", "Adesanya",
+              "Usman", "Edwards", "Muhammad", "Aspinall", "Topuria", "Dvalishvili", "Yan", "Pantoja",
+              "Moreno", "Prochazka", "Ankalaev", "Tsarukyan", "Gaethje", "Volkov", "Allen", "Fiziev"]
+STANCES = ["Orthodox", "Southpaw", "Switch", "Open Stance"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def page(body: str):
+    return f"<!DOCTYPE html><html><head><title>UFC Stats</title></head><body>{body}</body></html>"
+
+
+def fighter_page(fighter: dict, history: list):
+    stats = "".join(
+        f'<li class="b-list__box-list-item b-list__box-list-item_type_block">'
+        f'<i class="b-list__box-item-title">{label}:</i>\n        {value}</li>'
+        for label, value in fighter["stats"]
+    )
+    rows = ['<tr class="b-fight-details__table-row"><th>W/L</th><th>Fighter</th></tr>']
+    for result, opponent in history:
+        rows.append(
+            '<tr class="b-fight-details__table-row">'
+            f'<td class="b-fight-details__table-col"><p class="b-fight-details__table-text">{result}</p></td>'
+            f'<td class="b-fight-details__table-col">'
+            f'<p><a href="{fighter["url"]}">{fighter["name"]}</a></p>'
+            f'<p><a href="{opponent["url"]}">{opponent["name"]}</a></p></td></tr>'
+        )
+    return page(
+        f'<h2><span class="b-content__title-highlight">{fighter["name"]}</span></h2>'
+        f'<ul class="b-list__box-list">{stats}</ul>'
+        f'<table class="b-fight-details__table"><tbody>{"".join(rows)}</tbody></table>'
+    )
+
+
+def event_page(fights: list):
+    rows = [
+        '<tr class="b-fight-details__table-row"><td>W/L</td>'
+        f'<td><p><a href="{winner["url"]}">{winner["name"]}</a></p>'
+        f'<p><a href="{looser["url"]}">{looser["name"]}</a></p></td></tr>'
+        for winner, looser in fights
+    ]
+    return page(f'<table class="b-fight-details__table"><tbody>{"".join(rows)}</tbody></table>')
+
+
+def events_page(events: list):
+    rows = ['<tr class="b-statistics__table-row_type_first"><td></td></tr>']
+    for event in events:
+        rows.append(
+            f'<tr class="b-statistics__table-row"><td><i><a href="{event["url"]}">{event["name"]}</a>'
+            f'<span class="b-statistics__date">{event["date"].strftime("%B %d, %Y")}</span></i></td></tr>'
+        )
+    return page(f'<table class="b-statistics__table-events"><tbody>{"".join(rows)}</tbody></table>')
+
+
+def synthetic_site(n_events: int = 20, fights_per_event: int = 12, n_fighters: int = 150, seed: int = 0):
+    """Generate a consistent site: every fight appears on its event page and
+    in both fighters' histories, newest first."""
+    rng = random.Random(seed)
+    names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    rng.shuffle(names)
+
+    fighters = []
+    for name in names[:n_fighters]:
+        fighter_id = "%016x" % rng.getrandbits(64)
+        dob = f"{rng.choice(MONTHS)} {rng.randint(1, 28):02d}, {rng.randint(1980, 2002)}"
+        fighters.append({
+            "name": name,
+            "url": f"{LIVE_BASE_URL}/fighter-details/{fighter_id}",
+            "stats": [
+                ("Height", f"{rng.randint(5, 6)}' {rng.randint(0, 11)}\""),
+                ("Weight", f"{rng.choice([125, 135, 145, 155, 170, 185, 205, 265])} lbs."),
+                ("Reach", f'{rng.randint(62, 84)}"'),
+                ("STANCE", rng.choice(STANCES)),
+                ("DOB", dob),
+                ("SLpM", f"{rng.uniform(1, 8):.2f}"),
+                ("Str. Acc.", f"{rng.randint(30, 65)}%"),
+                ("SApM", f"{rng.uniform(1, 6):.2f}"),
+                ("Str. Def", f"{rng.randint(40, 70)}%"),
+                ("TD Avg.", f"{rng.uniform(0, 5):.2f}"),
+                ("TD Acc.", f"{rng.randint(0, 70)}%"),
+                ("TD Def.", f"{rng.randint(30, 100)}%"),
+                ("Sub. Avg.", f"{rng.uniform(0, 2):.1f}"),
+            ],
+        })
+
+    # Events are listed newest first; the first one is still upcoming and
+    # is dropped by get_events.
+    events, history = [], {fighter["url"]: [] for fighter in fighters}
+    pages = {}
+    day = date(2025, 1, 4)
+    for i in range(n_events + 1):
+        event_id = "%016x" % rng.getrandbits(64)
+        event = {"name": f"UFC Fight Night {1000 - i}", "url": f"{LIVE_BASE_URL}/event-details/{event_id}", "date": day}
+        fights = [tuple(rng.sample(fighters, 2)) for _ in range(fights_per_event)] if i else []
+        for winner, looser in fights:
+            history[winner["url"]].append(("win", looser))
+            history[looser["url"]].append(("loss", winner))
+        pages[urlsplit(event["url"]).path] = event_page(fights)
+        events.append(event)
+        day -= timedelta(days=rng.randint(7, 21))
+
+    pages["/statistics/events/completed"] = events_page(events)
+    for fighter in fighters:
+        pages[urlsplit(fighter["url"]).path] = fighter_page(fighter, history[fighter["url"]])
+    return pages
+
+
+def recorded_site(directory: str):
+    pages = {}
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            url_path = "/" + os.path.relpath(path, directory).replace(os.sep, "/")
+            url_path = url_path.split("?")[0].removesuffix(".html")
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages[url_path] = f.read()
+    return pages
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pages: dict, port: int = 0, latency_ms: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 0, seed: int = 0):
+        super().__init__(("127.0.0.1", port), FixtureHandler)
+        self.pages = pages
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        with self.lock:
+            self.statuses = Counter()
+            self.last_status = {}
+
+    def stats(self):
+        with self.lock:
+            failed = sorted(path for path, status in self.last_status.items() if status != 200)
+            return {
+                "requests": sum(self.statuses.values()),
+                "pages": len(self.last_status),
+                "statuses": dict(self.statuses),
+                "failed_pages": failed,
+            }
+
+    def choose_status(self, path: str):
+        with self.lock:
+            roll = self.rng.random()
+            if path not in self.pages:
+                status = 404
+            elif roll < self.throttle_rate:
+                status = 429
+            elif roll < self.throttle_rate + self.error_rate:
+                status = self.rng.choice(ERROR_STATUSES)
+            else:
+                status = 200
+            delay = self.latency_ms * self.rng.uniform(0.5, 1.5) / 1000
+            self.statuses[status] += 1
+            self.last_status[path] = status
+        return status, delay
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        status, delay = self.server.choose_status(path)
+        if delay:
+            time.sleep(delay)
+
+        body = b""
+        if status == 200:
+            body = self.server.pages[path].replace(LIVE_BASE_URL, self.server.base_url).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", str(self.server.retry_after))
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic or recorded ufcstats pages locally.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--fixtures", help="Directory of recorded pages; synthetic pages when omitted")
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--fights-per-event", type=int, default=12)
+    parser.add_argument("--fighters", type=int, default=150)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        pages = recorded_site(args.fixtures)
+    else:
+        pages = synthetic_site(args.events, args.fights_per_event, args.fighters, args.seed)
+    server = FixtureServer(pages, args.port, args.latency_ms, args.error_rate, args.throttle_rate,
+                           args.retry_after, args.seed)
+    print(f"Serving {len(pages)} pages on {server.base_url} (UFCSTATS_BASE_URL={server.base_url})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
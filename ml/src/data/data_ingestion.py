@@ -7,6 +7,11 @@ import time
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 import logging
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from profiling import profiler
+import fight_store
+import ratings
 from sklearn.model_selection import train_test_split
 
 # Logging configuration
@@ -26,12 +31,16 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
+profiled = profiler('data_ingestion')
+
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept-Language": "en-US,en;q=0.9",
 }
 
+BASE_URL = os.environ.get("UFCSTATS_BASE_URL", "http://www.ufcstats.com")
+
 session = requests.Session()
 
 retry_strategy = Retry(
@@ -45,6 +54,7 @@ session.mount("http://", adapter)
 session.mount("https://", adapter)
 
 
+@profiled
 def get_fighter_info(url):
     url = f"{url}"
         
@@ -112,11 +122,14 @@ def get_fighter_info(url):
             
     return stats
 
+@profiled
 def get_events():
     events = []
     try:
-        url = "http://www.ufcstats.com/statistics/events/completed?page=all"
-        html = requests.get(url, headers=headers).text
+        url = f"{BASE_URL}/statistics/events/completed?page=all"
+        response = session.get(url, headers=headers, timeout=10)
+        response.raise_for_status()
+        html = response.text
         soup = BeautifulSoup(html, "html.parser")
         
         rows = soup.select("table.b-statistics__table-events tbody tr")
@@ -143,9 +156,17 @@ def get_events():
         logger.error("Failed to load events %s", e)
     return events
 
+@profiled
 def get_fights(event):
     url = event['event_url']
-    html = requests.get(url, headers=headers).text
+    try:
+        response = session.get(url, headers=headers, timeout=10)
+        response.raise_for_status()
+    except Exception as e:
+        logger.error("Failed to load fights for %s %s", url, e)
+        return []
+
+    html = response.text
     soup = BeautifulSoup(html, 'html.parser')
     
     fights = []
@@ -163,10 +184,13 @@ def get_fights(event):
             "winner_url": fighter1_url,
             "looser": looser,
             "looser_url": fighter2_url,
-            "fight_date": event['event_date']
+            "fight_date": event['event_date'],
+            "event_name": event['event_name'],
+            "event_url": url
         })
     return fights
 
+@profiled
 def get_win_streaks(fighter1_url, opponent_name):
     try:
         r = session.get(fighter1_url, headers=headers, timeout=10)
@@ -218,6 +242,7 @@ def get_win_streaks(fighter1_url, opponent_name):
         "max_streak": maxs,
     }
     
+@profiled
 def get_fights_ds():
     try:
         events = get_events()
@@ -250,6 +275,7 @@ def get_fights_ds():
         
     return fights_dataset
 
+@profiled
 def get_fights_ds_with_stats(fights_dataset):
     fighter_cache = {}
     
@@ -326,12 +352,12 @@ def get_fights_ds_with_stats(fights_dataset):
     
     fights_dataset = pd.concat([fights_dataset, ws_df], axis=1)
     
-    fights_dataset = fights_dataset.drop(['winner_url', 'looser_url'], axis=1)
-    
     return fights_dataset
 
+@profiled
 def save_data(dataset: pd.DataFrame):
     try:
+        dataset = dataset.drop(['winner_url', 'looser_url', 'event_name', 'event_url'], axis=1, errors='ignore')
         dataset.to_csv("../../data/raw/fights_dataset_with_stats.csv", index=False)
         
         test, train = train_test_split(dataset, test_size=0.7, random_state=123, shuffle=False)
@@ -344,12 +370,36 @@ def save_data(dataset: pd.DataFrame):
     except Exception as e:
         logger.error('Error occured during saving the data %s', e)
 
+@profiled
+def store_data(dataset: pd.DataFrame):
+    # Keyed upserts: fights already in the store are updated in place and
+    # only new events, fights and fighters are added.
+    try:
+        conn = fight_store.connect()
+        try:
+            events = dataset[['event_url', 'event_name', 'fight_date']].drop_duplicates('event_url')
+            events = events.rename(columns={'fight_date': 'event_date'})
+            fight_store.upsert_events(conn, fight_store.records(events))
+            fight_store.upsert_fights(conn, fight_store.records(dataset))
+
+            fighters = dict(zip(dataset.winner_url, dataset.winner)) | dict(zip(dataset.looser_url, dataset.looser))
+            fight_store.upsert_fighter_names(conn, fighters)
+            ratings.update_ratings(conn)
+        finally:
+            conn.close()
+
+        logger.debug('Data stored in %s', os.path.abspath(fight_store.DB_PATH))
+    except Exception as e:
+        logger.error('Error occured during storing the data %s', e)
+
+@profiled
 def main():
     fights_dataset = get_fights_ds()
     
     fights_dataset_with_stats = get_fights_ds_with_stats(fights_dataset)
     
     save_data(fights_dataset_with_stats)
+    store_data(fights_dataset_with_stats)
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
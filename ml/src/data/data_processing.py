@@ -2,6 +2,11 @@ import pandas as pd
 import logging
 from sklearn.model_selection import train_test_split
 import os
+import sys
+import yaml
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from profiling import profiler
+import fight_store
 
 # Logging configuration
 logger = logging.getLogger('data_processing')
@@ -20,6 +25,12 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
+profiled = profiler('data_processing')
+
+# params.yaml and the data.source path in it are relative to ml/.
+ML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+@profiled
 def drop_nas(df: pd.DataFrame):
     df = df.dropna()
     df = df.drop_duplicates()
@@ -29,6 +40,7 @@ def drop_nas(df: pd.DataFrame):
     df = df[~((df.dob_1 == "--") | (df.dob_2 == "--"))]
     return df
 
+@profiled
 def height_processing(df: pd.DataFrame):
     try:
         for idx, row in df.iterrows():
@@ -51,6 +63,7 @@ def height_processing(df: pd.DataFrame):
         logger.error("Failed to preprocess height %s", e)
         raise
     
+@profiled
 def weight_processing(df: pd.DataFrame):
     try:
         df = df.drop('weight_2', axis=1)
@@ -69,6 +82,7 @@ def weight_processing(df: pd.DataFrame):
         logger.error("Failed to preprocess weight %s", e)
         raise
 
+@profiled
 def reach_processing(df: pd.DataFrame):
     try:
         for idx, row in df.iterrows():
@@ -85,6 +99,7 @@ def reach_processing(df: pd.DataFrame):
         logger.error("Failed to preprocess reach %s", e)
         raise
     
+@profiled
 def age_processing(df: pd.DataFrame):
     try:
         for idx, row in df.iterrows():
@@ -108,6 +123,7 @@ def age_processing(df: pd.DataFrame):
         logger.error("Failed to preprocess age %s", e)
         raise
         
+@profiled
 def career_stats_processing(df: pd.DataFrame):
     try:
         cs_cols = ['stracc_1', 'strdef_1', 'tdacc_1', 'tddef_1', 'stracc_2', 'strdef_2', 'tdacc_2', 'tddef_2']
@@ -127,6 +143,7 @@ def career_stats_processing(df: pd.DataFrame):
         logger.error("Failed to preprocess career stats %s", e)
         raise
         
+@profiled
 def stance_processing(df: pd.DataFrame):
     try:
         encoding_dict = {
@@ -145,6 +162,7 @@ def stance_processing(df: pd.DataFrame):
         logger.error("Failed to preprocess stance %s", e)
         raise
     
+@profiled
 def data_preprocessing(df: pd.DataFrame):
     df = height_processing(df)
     df = weight_processing(df)
@@ -156,6 +174,7 @@ def data_preprocessing(df: pd.DataFrame):
     df = df.drop(['winner', 'looser'], axis=1)
     return df
     
+@profiled
 def feature_engineering(df: pd.DataFrame):
     try:
         drop_cols = df.columns[:-1]
@@ -218,6 +237,11 @@ def feature_engineering(df: pd.DataFrame):
             cur_streak_2 = df.at[idx, 'cur_streak_2']
             df.at[idx, 'cur_streak_diff'] = cur_streak_1 - cur_streak_2
             
+            if 'elo_1' in df.columns:
+                elo_1 = df.at[idx, 'elo_1']
+                elo_2 = df.at[idx, 'elo_2']
+                df.at[idx, 'elo_diff'] = elo_1 - elo_2
+            
         df = df.drop(columns=drop_cols, axis=1)
         
         logger.debug("Feature engineering done successfully")
@@ -226,26 +250,78 @@ def feature_engineering(df: pd.DataFrame):
         logger.error("Failed to do feature engineering %s", e)
         raise
 
-def save_data(df: pd.DataFrame):
+@profiled
+def save_data(df: pd.DataFrame, output_dir: str = None):
     try:
         test, train = train_test_split(df, test_size=0.7, random_state=123, shuffle=False)
-        os.makedirs("ml/data/processed", exist_ok=True)
-        train.to_csv("ml/data/processed/train_processed.csv", index=False)
-        test.to_csv("ml/data/processed/test_processed.csv", index=False)
+        # ml/data/processed, the stage's DVC output, from any working directory.
+        data_path = os.path.abspath(output_dir or os.path.join(ML_DIR, "data", "processed"))
+        os.makedirs(data_path, exist_ok=True)
+        train.to_csv(os.path.join(data_path, "train_processed.csv"), index=False)
+        test.to_csv(os.path.join(data_path, "test_processed.csv"), index=False)
         
-        data_path = os.path.abspath("../../ml/data/processed")
         logger.debug("Saved data in %s", data_path)
     except Exception as e:
         logger.error("Failed to save data %s", e)
         raise     
 
-def main():
-    df = pd.read_csv("ml/data/raw/fights_dataset_with_stats.csv")
+def get_params():
+    try:
+        params_path = os.path.join(ML_DIR, "params.yaml")
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        
+        data_params = params.get('data', {})
+        feature_params = params.get('features', {})
+        
+        logger.debug("Parameters extracted")
+        return data_params, feature_params
+    except Exception as e:
+        logger.error("Failed to load parameters %s", e)
+        raise
+
+@profiled
+def load_data(source: str, use_elo: bool = False):
+    try:
+        # The source is chosen in params.yaml (data.source), so DVC tracks the
+        # file that is actually read. From the fight store only the columns
+        # used below are read.
+        path = os.path.join(ML_DIR, source)
+        if path.endswith(".db"):
+            columns = fight_store.RAW_COLUMNS
+            conn = fight_store.connect(path, readonly=True)
+            try:
+                if use_elo:
+                    # As-of ratings sit just before outcome, which has to stay
+                    # the last column for feature_engineering.
+                    columns = columns[:-1] + ['elo_1', 'elo_2'] + columns[-1:]
+                df = fight_store.read_fights(conn, columns)
+            finally:
+                conn.close()
+            # Ratings are written by data_ingestion.py (or ratings.py), never
+            # here: this stage only reads the store.
+            unrated = df[['elo_1', 'elo_2']].isna().any(axis=1).sum() if use_elo else 0
+            if unrated:
+                raise ValueError(f"{unrated} fights in {source} have no Elo ratings; run src/data/ratings.py first")
+        elif use_elo:
+            raise ValueError(f"elo_diff needs the fight store as data.source, got {source}")
+        else:
+            df = pd.read_csv(path)
+        logger.debug("Loaded %d fights from %s", len(df), os.path.abspath(path))
+        return df
+    except Exception as e:
+        logger.error("Failed to load data %s", e)
+        raise
+
+@profiled
+def main(source: str = None, output_dir: str = None):
+    data_params, feature_params = get_params()
+    df = load_data(source or data_params['source'], feature_params.get('elo_diff', False))
     df = drop_nas(df)
     df = data_preprocessing(df)
     df = feature_engineering(df)
     
-    save_data(df)
+    save_data(df, output_dir)
 
 if __name__ == "__main__":
     main()
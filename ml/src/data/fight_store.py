@@ -0,0 +1,319 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+
+# Logging configuration
+logger = logging.getLogger('fight_store')
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel(logging.ERROR)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# Single SQLite file holding events, fights and fighters (ml/data/ufc.db by
+# default). Fights are keyed by the sorted pair of fighter urls, the year and
+# a bout number counted from the oldest fight, so a fight keeps its key when
+# it is scraped again or when the dataset orientation (winner/looser) is
+# re-randomized. The default rollback journal is kept on purpose: every
+# commit touches the main file, which is what the API roster watcher polls.
+DB_PATH = os.environ.get(
+    "UFC_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "ufc.db"),
+)
+
+FIGHTER_STATS = [
+    ("height", "TEXT"), ("weight", "TEXT"), ("reach", "TEXT"), ("stance", "TEXT"), ("dob", "TEXT"),
+    ("slpm", "REAL"), ("stracc", "TEXT"), ("sapm", "REAL"), ("strdef", "TEXT"), ("tdavg", "REAL"),
+    ("tdacc", "TEXT"), ("tddef", "TEXT"), ("subavg", "REAL"),
+]
+STREAK_COLUMNS = ["cur_streak_1", "max_streak_1", "cur_streak_2", "max_streak_2"]
+
+# Column order of fights_dataset_with_stats.csv.
+RAW_COLUMNS = (
+    ["winner", "looser"]
+    + [f"{stat}_1" for stat, _ in FIGHTER_STATS]
+    + [f"{stat}_2" for stat, _ in FIGHTER_STATS]
+    + ["fight_date"] + STREAK_COLUMNS + ["outcome"]
+)
+FIGHT_KEY = ["fighter_a_url", "fighter_b_url", "fight_date", "bout"]
+FIGHT_COLUMNS = FIGHT_KEY + ["event_url", "winner_url", "looser_url", "position"] + [
+    column for column in RAW_COLUMNS if column != "fight_date"
+]
+
+# As-of Elo ratings (ratings.py) are stored per fight aligned with the key,
+# and read back in the dataset's winner/looser orientation.
+RATING_COLUMNS = {
+    "elo_1": "CASE WHEN winner_url = fighter_a_url THEN elo_a ELSE elo_b END",
+    "elo_2": "CASE WHEN winner_url = fighter_a_url THEN elo_b ELSE elo_a END",
+}
+
+# Key order of processed_fighterdata.json.
+ROSTER_COLUMNS = [
+    "name", "nickname", "division", "rating", "record", "url", "height", "reach", "stance", "slpm", "stracc",
+    "sapm", "strdef", "tdavg", "tdacc", "tddef", "subavg", "cur_streak", "max_streak", "age",
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS events (
+    url TEXT PRIMARY KEY,
+    name TEXT,
+    event_date INTEGER,
+    position INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events (event_date);
+
+CREATE TABLE IF NOT EXISTS fights (
+    fighter_a_url TEXT NOT NULL,
+    fighter_b_url TEXT NOT NULL,
+    fight_date INTEGER NOT NULL,
+    bout INTEGER NOT NULL,
+    event_url TEXT REFERENCES events (url),
+    winner_url TEXT,
+    looser_url TEXT,
+    position INTEGER,
+    winner TEXT,
+    looser TEXT,
+    {", ".join(f"{stat}_{side} {kind}" for side in (1, 2) for stat, kind in FIGHTER_STATS)},
+    {", ".join(f"{column} REAL" for column in STREAK_COLUMNS)},
+    outcome REAL,
+    elo_a REAL,
+    elo_b REAL,
+    PRIMARY KEY ({", ".join(FIGHT_KEY)})
+);
+CREATE INDEX IF NOT EXISTS idx_fights_position ON fights (position);
+CREATE INDEX IF NOT EXISTS idx_fights_date ON fights (fight_date);
+CREATE INDEX IF NOT EXISTS idx_fights_fighter_a ON fights (fighter_a_url);
+CREATE INDEX IF NOT EXISTS idx_fights_fighter_b ON fights (fighter_b_url);
+
+CREATE TABLE IF NOT EXISTS fighters (
+    name TEXT NOT NULL,
+    nickname TEXT,
+    division TEXT,
+    rating INTEGER,
+    record TEXT,
+    url TEXT PRIMARY KEY,
+    height INTEGER,
+    reach INTEGER,
+    stance INTEGER,
+    slpm REAL,
+    stracc REAL,
+    sapm REAL,
+    strdef REAL,
+    tdavg REAL,
+    tdacc REAL,
+    tddef REAL,
+    subavg REAL,
+    cur_streak INTEGER,
+    max_streak INTEGER,
+    age INTEGER,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_fighters_name ON fighters (name);
+CREATE INDEX IF NOT EXISTS idx_fighters_division_rating ON fighters (division, rating);
+
+CREATE TABLE IF NOT EXISTS ratings (
+    url TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    fights INTEGER NOT NULL,
+    updated_at REAL
+);
+"""
+
+# Columns added after a table was first created: (table, column, type).
+MIGRATIONS = [("fights", "elo_a", "REAL"), ("fights", "elo_b", "REAL")]
+
+
+def connect(path: str = DB_PATH, readonly: bool = False):
+    if readonly:
+        # For readers (data_processing): no schema setup, and a missing store
+        # is an error instead of a new empty file.
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    for table, column, kind in MIGRATIONS:
+        columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+    conn.commit()
+    return conn
+
+
+def upsert(conn, table: str, columns: list, key: list, rows: list):
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column not in key)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}"
+    )
+    with conn:
+        conn.executemany(sql, ([row.get(column) for column in columns] for row in rows))
+    return len(rows)
+
+
+def upsert_events(conn, events: list):
+    rows = [
+        {"url": event["event_url"], "name": event.get("event_name"), "event_date": event.get("event_date"),
+         "position": position}
+        for position, event in enumerate(events)
+    ]
+    return upsert(conn, "events", ["url", "name", "event_date", "position"], ["url"], rows)
+
+
+def fight_keys(fights: list):
+    """Attach the fight key to scraped fight dicts, listed newest first."""
+    bouts = {}
+    for fight in reversed(fights):
+        pair = tuple(sorted([fight["winner_url"], fight["looser_url"]]))
+        year = int(fight["fight_date"])
+        bout = bouts[pair, year] = bouts.get((pair, year), -1) + 1
+        fight.update({"fighter_a_url": pair[0], "fighter_b_url": pair[1], "fight_date": year, "bout": bout})
+    for position, fight in enumerate(fights):
+        fight["position"] = position
+    return fights
+
+
+def upsert_fights(conn, fights: list):
+    """Upsert scraped fights (with stats), listed newest first like the
+    event list. Fights without a date cannot be keyed and are skipped."""
+    dated = [dict(fight) for fight in fights if fight.get("fight_date") is not None]
+    if len(dated) < len(fights):
+        logger.debug("Skipped %d fights without a date", len(fights) - len(dated))
+    return upsert(conn, "fights", FIGHT_COLUMNS, FIGHT_KEY, fight_keys(dated))
+
+
+def upsert_fighters(conn, fighters: list):
+    now = time.time()
+    rows = {}
+    for fighter in fighters:
+        url = fighter.get("url")
+        if not url:
+            continue
+        if url in rows and rows[url]["name"] != fighter["name"]:
+            # Two names on one profile url means one record was scraped from
+            # the wrong page; keep the first rather than merge them.
+            logger.error("Skipped %s: url %s already belongs to %s", fighter["name"], url, rows[url]["name"])
+            continue
+        rows[url] = dict(fighter, updated_at=now)
+    return upsert(conn, "fighters", ROSTER_COLUMNS + ["updated_at"], ["url"], list(rows.values()))
+
+
+def unrank_fighters(conn, urls: list):
+    # Fighters dropped from the roster keep their row (fights reference
+    # them) but leave read_roster() once they have no rating.
+    with conn:
+        conn.executemany(
+            "UPDATE fighters SET rating = NULL, updated_at = ? WHERE url = ?",
+            [(time.time(), url) for url in urls],
+        )
+    return len(urls)
+
+
+def upsert_fighter_names(conn, fighters: dict):
+    # Scraped fighters only carry url and name; roster fields are left as is.
+    with conn:
+        conn.executemany(
+            "INSERT INTO fighters (url, name) VALUES (?, ?) ON CONFLICT (url) DO UPDATE SET name = excluded.name",
+            fighters.items(),
+        )
+    return len(fighters)
+
+
+def records(df):
+    # DataFrame rows as dicts with missing values as None (NULL), not NaN.
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def read_fights(conn, columns: list = RAW_COLUMNS):
+    """Read only the requested fight columns, newest first, as a DataFrame."""
+    import pandas as pd
+
+    unknown = set(columns) - set(FIGHT_COLUMNS) - set(RATING_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown fight columns: {sorted(unknown)}")
+    select = [f"{RATING_COLUMNS[column]} AS {column}" if column in RATING_COLUMNS else column for column in columns]
+    return pd.read_sql_query(f"SELECT {', '.join(select)} FROM fights ORDER BY position", conn)
+
+
+def read_roster(conn, division: str = None):
+    """Ranked fighters as processed_fighterdata.json records."""
+    sql = f"SELECT {', '.join(ROSTER_COLUMNS)} FROM fighters WHERE rating IS NOT NULL"
+    params = ()
+    if division is not None:
+        sql += " AND division = ?"
+        params = (division,)
+    rows = conn.execute(sql + " ORDER BY division, rating", params).fetchall()
+    return [{key: row[key] for key in row.keys() if row[key] is not None} for row in rows]
+
+
+def import_legacy(conn, raw_dir: str, roster_path: str):
+    """Load the existing CSV/JSON datasets into the store.
+
+    fights_dataset_randomized.csv carries the fighter urls and
+    fights_dataset_with_stats.csv the stats, row for row in the same order.
+    """
+    import pandas as pd
+
+    urls = pd.read_csv(os.path.join(raw_dir, "fights_dataset_randomized.csv"), index_col=0)
+    stats = pd.read_csv(os.path.join(raw_dir, "fights_dataset_with_stats.csv"))
+    if len(urls) != len(stats) or not (urls.winner.values == stats.winner.values).all():
+        raise ValueError("fights_dataset_randomized.csv and fights_dataset_with_stats.csv are not aligned")
+
+    fights = stats.assign(winner_url=urls.winner_url.values, looser_url=urls.looser_url.values)
+    n_fights = upsert_fights(conn, records(fights))
+
+    fighters = dict(zip(urls.winner_url, urls.winner)) | dict(zip(urls.looser_url, urls.looser))
+    upsert_fighter_names(conn, fighters)
+
+    n_roster = 0
+    if roster_path and os.path.exists(roster_path):
+        with open(roster_path, "r", encoding="utf-8") as f:
+            n_roster = upsert_fighters(conn, json.load(f))
+
+    logger.debug("Imported %d fights, %d fighters, %d roster records", n_fights, len(fighters), n_roster)
+
+
+def main():
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data")
+    repo_dir = os.path.join(data_dir, "..", "..")
+
+    parser = argparse.ArgumentParser(description="Manage the SQLite fight store.")
+    parser.add_argument("--db", default=DB_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Import the existing CSV and JSON datasets")
+    import_parser.add_argument("--raw-dir", default=os.path.join(data_dir, "raw"))
+    import_parser.add_argument("--roster", default=os.path.join(repo_dir, "web-app", "data", "processed_fighterdata.json"))
+    roster_parser = subparsers.add_parser("import-roster", help="Upsert processed fighter records from JSON")
+    roster_parser.add_argument("path")
+    export_parser = subparsers.add_parser("export-roster", help="Write ranked fighters as JSON")
+    export_parser.add_argument("path")
+    args = parser.parse_args()
+
+    with connect(args.db) as conn:
+        if args.command == "import":
+            import_legacy(conn, args.raw_dir, args.roster)
+        elif args.command == "import-roster":
+            with open(args.path, "r", encoding="utf-8") as f:
+                logger.debug("Upserted %d fighters", upsert_fighters(conn, json.load(f)))
+        else:
+            with open(args.path, "w", encoding="utf-8") as f:
+                json.dump(read_roster(conn), f, indent=4)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
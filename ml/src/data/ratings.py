@@ -0,0 +1,131 @@
+import argparse
+import logging
+import time
+
+import fight_store
+
+# Logging configuration
+logger = logging.getLogger('ratings')
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel(logging.ERROR)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# Elo over the fight history in the fight store. Fights are replayed oldest
+# first (highest position first); each fight stores both fighters' ratings
+# before it (fights.elo_a / elo_b, aligned with fighter_a_url / fighter_b_url),
+# which are the as-of training features. The ratings table holds the current
+# rating of every fighter and is what ml_api reads. Only fights without
+# stored ratings are replayed, so a new event costs O(fights in the event).
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+# Ratings of new fighters move faster until they have a few fights.
+PROVISIONAL_FIGHTS = 5
+PROVISIONAL_K_FACTOR = 48.0
+
+
+def expected_score(rating: float, opponent: float):
+    return 1.0 / (1.0 + 10 ** ((opponent - rating) / 400.0))
+
+
+def k_factor(fights: int):
+    return PROVISIONAL_K_FACTOR if fights < PROVISIONAL_FIGHTS else K_FACTOR
+
+
+def rate_fight(ratings: dict, winner_url: str, looser_url: str):
+    """Update ratings in place for one decided fight and return the
+    ratings both fighters had before it."""
+    winner_rating, winner_fights = ratings.get(winner_url, (INITIAL_RATING, 0))
+    looser_rating, looser_fights = ratings.get(looser_url, (INITIAL_RATING, 0))
+    expected = expected_score(winner_rating, looser_rating)
+    ratings[winner_url] = (winner_rating + k_factor(winner_fights) * (1 - expected), winner_fights + 1)
+    ratings[looser_url] = (looser_rating - k_factor(looser_fights) * (1 - expected), looser_fights + 1)
+    return winner_rating, looser_rating
+
+
+def load_ratings(conn):
+    return {row["url"]: (row["rating"], row["fights"]) for row in conn.execute("SELECT url, rating, fights FROM ratings")}
+
+
+def update_ratings(conn, rebuild: bool = False):
+    """Rate every fight that has no stored as-of ratings yet.
+
+    Fights are expected to arrive newest-last; a fight inserted before
+    already rated ones is rated against the current ratings, so run with
+    rebuild=True after backfilling history.
+    """
+    try:
+        with conn:
+            if rebuild:
+                conn.execute("DELETE FROM ratings")
+                conn.execute("UPDATE fights SET elo_a = NULL, elo_b = NULL")
+
+            pending = conn.execute(
+                "SELECT fighter_a_url, fighter_b_url, fight_date, bout, winner_url, looser_url, outcome "
+                "FROM fights WHERE elo_a IS NULL ORDER BY position DESC"
+            ).fetchall()
+            if not pending:
+                return 0
+
+            ratings = load_ratings(conn)
+            touched, as_of = set(), []
+            for fight in pending:
+                a, b = fight["fighter_a_url"], fight["fighter_b_url"]
+                if fight["outcome"] is None:
+                    rating_a = ratings.get(a, (INITIAL_RATING, 0))[0]
+                    rating_b = ratings.get(b, (INITIAL_RATING, 0))[0]
+                else:
+                    # outcome == 1 means the fighter listed first (winner) won.
+                    won, lost = fight["winner_url"], fight["looser_url"]
+                    if fight["outcome"] != 1:
+                        won, lost = lost, won
+                    before = dict(zip((won, lost), rate_fight(ratings, won, lost)))
+                    rating_a, rating_b = before[a], before[b]
+                    touched.update((a, b))
+                as_of.append((rating_a, rating_b, a, b, fight["fight_date"], fight["bout"]))
+
+            conn.executemany(
+                "UPDATE fights SET elo_a = ?, elo_b = ? "
+                "WHERE fighter_a_url = ? AND fighter_b_url = ? AND fight_date = ? AND bout = ?",
+                as_of,
+            )
+            now = time.time()
+            conn.executemany(
+                "INSERT INTO ratings (url, rating, fights, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET rating = excluded.rating, fights = excluded.fights, "
+                "updated_at = excluded.updated_at",
+                [(url, *ratings[url], now) for url in touched],
+            )
+
+        logger.debug("Rated %d fights, %d fighters updated", len(pending), len(touched))
+        return len(pending)
+    except Exception as e:
+        logger.error("Failed to update ratings %s", e)
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update Elo ratings from the fight store.")
+    parser.add_argument("--db", default=fight_store.DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="Replay the whole history from scratch")
+    args = parser.parse_args()
+
+    conn = fight_store.connect(args.db)
+    try:
+        update_ratings(conn, args.rebuild)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,9 @@ import os
 import yaml
 import logging
 import pickle
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from profiling import profiler
 
 # Logging configuration
 logger = logging.getLogger('model_building')
@@ -27,6 +30,9 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
+profiled = profiler('model_building')
+
+@profiled
 def get_params():
     try:
         with open("params.yaml", 'r') as file:
@@ -42,6 +48,7 @@ def get_params():
         logger.error("Failed to load parameters %s", e)
         raise
     
+@profiled
 def model_building(rfc_params: dict, lgbm_params: dict, xgboost_params: dict):
     try:
         model_rfc = RandomForestClassifier(**rfc_params, random_state=123)
@@ -66,6 +73,7 @@ def model_building(rfc_params: dict, lgbm_params: dict, xgboost_params: dict):
         logger.error("Failed to create a model %s", e)
         raise
     
+@profiled
 def model_training(model, df: pd.DataFrame):
     try:
         X_train = df.drop('outcome', axis=1)
@@ -79,6 +87,7 @@ def model_training(model, df: pd.DataFrame):
         logger.error("Failed to train the model %s", e)
         raise
     
+@profiled
 def save_model(model, file_path: str):
     try:
         with open(file_path, 'wb') as file:
@@ -89,6 +98,7 @@ def save_model(model, file_path: str):
         logger.error("Failed to save the model %s", e)
         raise
 
+@profiled
 def main():
     df = pd.read_csv("ml/data/processed/train_processed.csv")
     rfc_params, lgbm_params, xgboost_params = get_params()
@@ -0,0 +1,259 @@
+import pandas as pd
+import numpy as np
+import logging
+import pickle
+import json
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "ml_api"))
+from compiled_model import CompiledEnsemble, TreeEnsemble
+
+# Logging configuration
+logger = logging.getLogger('model_export')
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel(logging.ERROR)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# Inputs and outputs are resolved against ml/, like the paths in dvc.yaml,
+# so the stage reads and writes the same files from any working directory.
+ML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+# Artifact layout (read by ml_api/compiled_model.py):
+#   feature_names, classes, estimator_names, estimator_kinds,
+#   meta_coef, meta_intercept and, for every base estimator i,
+#   est{i}_feature / _threshold / _left / _right / _value / _roots / _depth / _base / _dtype.
+# Trees are flattened into one node array per estimator. A sample goes left
+# when x[feature] <= threshold. Leaves point to themselves with an infinite
+# threshold, so walking exactly `depth` steps always ends on a leaf.
+# Kind "mean" averages the leaf values (random forest class-1 probability).
+# Kind "logistic" is sigmoid(base + sum of leaf values) (boosted trees).
+# dtype is the precision inputs are compared in: scikit-learn and XGBoost cast
+# X to float32, LightGBM compares in double.
+# value also holds every internal node's value (for XGBoost, the cover-weighted
+# mean of its children), which ml_api/explain.py uses for attributions.
+MAX_ABS_ERROR = 1e-6
+
+
+def tree_depth(left: list, right: list, root: int = 0):
+    depth, stack = 0, [(root, 0)]
+    while stack:
+        node, d = stack.pop()
+        depth = max(depth, d)
+        if left[node] != -1:
+            stack.append((left[node], d + 1))
+            stack.append((right[node], d + 1))
+    return depth
+
+
+def sklearn_trees(forest):
+    trees = []
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        value = value[:, 1] / value.sum(axis=1)
+        trees.append((
+            tree.feature.tolist(),
+            tree.threshold.tolist(),
+            tree.children_left.tolist(),
+            tree.children_right.tolist(),
+            value.tolist(),
+        ))
+    return trees
+
+
+def xgboost_trees(model, feature_names: list):
+    trees = []
+    for dump in model.get_booster().get_dump(dump_format='json', with_stats=True):
+        nodes = {}
+        stack = [json.loads(dump)]
+        while stack:
+            node = stack.pop()
+            nodes[node['nodeid']] = node
+            stack.extend(node.get('children', []))
+
+        size = max(nodes) + 1
+        feature, threshold = [-2] * size, [0.0] * size
+        left, right, value = [-1] * size, [-1] * size, [0.0] * size
+
+        for node_id, node in nodes.items():
+            if 'leaf' in node:
+                value[node_id] = node['leaf']
+                continue
+            split = node['split']
+            feature[node_id] = feature_names.index(split) if split in feature_names else int(split[1:])
+            # XGBoost splits on x < t in float32; the largest float32 below t
+            # turns that into the x <= t rule used for every estimator here.
+            threshold[node_id] = float(np.nextafter(np.float32(node['split_condition']), np.float32(-np.inf)))
+            left[node_id] = node['yes']
+            right[node_id] = node['no']
+
+        # Children always have larger ids than their parent.
+        for node_id in sorted(nodes, reverse=True):
+            if 'leaf' not in nodes[node_id]:
+                yes, no = left[node_id], right[node_id]
+                cover_yes, cover_no = nodes[yes]['cover'], nodes[no]['cover']
+                value[node_id] = (value[yes] * cover_yes + value[no] * cover_no) / (cover_yes + cover_no)
+
+        trees.append((feature, threshold, left, right, value))
+    return trees
+
+
+def lightgbm_trees(model):
+    dump = model.booster_.dump_model()
+    sigmoid = 1.0
+    for part in dump['objective'].split():
+        if part.startswith('sigmoid:'):
+            sigmoid = float(part.split(':')[1])
+
+    trees = []
+    for info in dump['tree_info']:
+        feature, threshold, left, right, value = [], [], [], [], []
+
+        def add(node):
+            node_id = len(feature)
+            feature.append(-2)
+            threshold.append(0.0)
+            left.append(-1)
+            right.append(-1)
+            if 'leaf_value' in node:
+                value.append(node['leaf_value'] * sigmoid)
+                return node_id
+            value.append(node['internal_value'] * sigmoid)
+
+            if node['decision_type'] != '<=' or node['missing_type'] == 'Zero':
+                raise ValueError(f"Unsupported LightGBM split {node['decision_type']} / {node['missing_type']}")
+            feature[node_id] = node['split_feature']
+            threshold[node_id] = node['threshold']
+            left[node_id] = add(node['left_child'])
+            right[node_id] = add(node['right_child'])
+            return node_id
+
+        add(info['tree_structure'])
+        trees.append((feature, threshold, left, right, value))
+    return trees
+
+
+def flatten_trees(trees: list):
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    depth = 0
+
+    for t_feature, t_threshold, t_left, t_right, t_value in trees:
+        offset = len(feature)
+        roots.append(offset)
+        depth = max(depth, tree_depth(t_left, t_right))
+
+        for node in range(len(t_feature)):
+            if t_left[node] == -1:
+                feature.append(0)
+                threshold.append(np.inf)
+                left.append(offset + node)
+                right.append(offset + node)
+            else:
+                feature.append(t_feature[node])
+                threshold.append(t_threshold[node])
+                left.append(offset + t_left[node])
+                right.append(offset + t_right[node])
+            value.append(t_value[node])
+
+    return {
+        'feature': np.array(feature, dtype=np.int32),
+        'threshold': np.array(threshold, dtype=np.float64),
+        'left': np.array(left, dtype=np.int32),
+        'right': np.array(right, dtype=np.int32),
+        'value': np.array(value, dtype=np.float64),
+        'roots': np.array(roots, dtype=np.int32),
+        'depth': np.array(depth, dtype=np.int32),
+    }
+
+
+def export_model(model, X: np.ndarray):
+    try:
+        feature_names = [str(f) for f in model.feature_names_in_]
+
+        artifact = {
+            'feature_names': np.array(feature_names),
+            'classes': np.asarray(model.classes_),
+            'meta_coef': model.final_estimator_.coef_[0].astype(np.float64),
+            'meta_intercept': np.float64(model.final_estimator_.intercept_[0]),
+        }
+        names, kinds = [], []
+
+        for i, (name, estimator) in enumerate(zip(model.named_estimators_, model.estimators_)):
+            if name == 'random_forest_classifier':
+                kind, arrays = 'mean', flatten_trees(sklearn_trees(estimator))
+                arrays['base'] = np.float64(0.0)
+                arrays['dtype'] = np.array('float32')
+            elif name == 'xgboost':
+                kind, arrays = 'logistic', flatten_trees(xgboost_trees(estimator, feature_names))
+                arrays['dtype'] = np.array('float32')
+                margin = estimator.predict(X, output_margin=True)
+                trees = TreeEnsemble({**arrays, 'base': 0.0}, kind)
+                arrays['base'] = np.float64(np.mean(margin - trees.raw(X)))
+            elif name == 'lightgbm':
+                kind, arrays = 'logistic', flatten_trees(lightgbm_trees(estimator))
+                arrays['base'] = np.float64(0.0)
+                arrays['dtype'] = np.array('float64')
+            else:
+                raise ValueError(f"Unsupported estimator {name}")
+
+            names.append(name)
+            kinds.append(kind)
+            for key, value in arrays.items():
+                artifact[f'est{i}_{key}'] = value
+
+        artifact['estimator_names'] = np.array(names)
+        artifact['estimator_kinds'] = np.array(kinds)
+
+        logger.debug("Model exported")
+        return artifact
+    except Exception as e:
+        logger.error("Failed to export the model %s", e)
+        raise
+
+
+def verify_export(model, artifact: dict, X: np.ndarray):
+    # Check the evaluator the API runs, on the same float64 rows the API
+    # builds.
+    proba = CompiledEnsemble(artifact).predict_proba(X)[:, 1]
+
+    error = np.abs(proba - model.predict_proba(X)[:, 1]).max()
+    if error > MAX_ABS_ERROR:
+        logger.error("Exported model deviates from the original by %s", error)
+        raise ValueError(f"Exported model deviates from the original by {error}")
+    logger.debug("Exported model verified, max abs error %s", error)
+
+
+def save_artifact(artifact: dict, file_path: str):
+    try:
+        np.savez(file_path, **artifact)
+        logger.debug("Artifact saved")
+    except Exception as e:
+        logger.error("Failed to save the artifact %s", e)
+        raise
+
+
+def main():
+    df = pd.read_csv(os.path.join(ML_DIR, "data", "processed", "test_processed.csv"))
+    X = df.drop('outcome', axis=1).to_numpy()
+
+    with open(os.path.join(ML_DIR, "model.pkl"), "rb") as file:
+        model = pickle.load(file)
+
+    artifact = export_model(model, X)
+    verify_export(model, artifact, X)
+
+    save_artifact(artifact, os.path.join(ML_DIR, "model.npz"))
+
+if __name__ == '__main__':
+    main()
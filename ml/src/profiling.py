@@ -0,0 +1,405 @@
+import argparse
+import atexit
+import functools
+import html
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+
+# Logging configuration
+logger = logging.getLogger('profiling')
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+
+# Profiling is off unless PIPELINE_PROFILE=1; the decorators are then no-ops.
+#   PIPELINE_PROFILE_DIR        where runs are written (default: profiles)
+#   PIPELINE_PROFILE_RUN        run name shared by all stages (default: latest)
+#   PIPELINE_PROFILE_FLAMEGRAPH comma separated function names to sample
+# Every stage writes <dir>/<run>/<stage>.json on exit and rebuilds the
+# consolidated report.json / report.html from all stage files in the run.
+ENABLED = os.environ.get("PIPELINE_PROFILE", "0") == "1"
+PROFILE_DIR = os.environ.get("PIPELINE_PROFILE_DIR", "profiles")
+PROFILE_RUN = os.environ.get("PIPELINE_PROFILE_RUN", "latest")
+FLAMEGRAPH_FUNCTIONS = {
+    name.strip() for name in os.environ.get("PIPELINE_PROFILE_FLAMEGRAPH", "").split(",") if name.strip()
+}
+
+RSS_SAMPLE_SECONDS = 0.01
+STACK_SAMPLE_SECONDS = 0.005
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+METRICS = ["calls", "wall_s", "cpu_s", "peak_rss_mb", "rows_in", "rows_out", "read_mb", "written_mb"]
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def io_counters():
+    # rchar/wchar count every read()/write() of the process, so they cover
+    # CSV and pickle files as well as HTTP responses during ingestion.
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def row_count(value):
+    shape = getattr(value, "shape", None)
+    if shape:
+        return int(shape[0])
+    if isinstance(value, list):
+        return len(value)
+    return None
+
+
+class Call:
+    def __init__(self, name: str, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.read_started, self.written_started = io_counters()
+        self.peak_rss = current_rss()
+
+
+class StageProfile:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.started_at = time.time()
+        self.functions = {}
+        self.active = []
+        self.lock = threading.Lock()
+        self.sampler = None
+
+    def begin(self, name: str, rows_in=None):
+        call = Call(name, rows_in)
+        with self.lock:
+            self.active.append(call)
+        self._ensure_sampler()
+        return call
+
+    def end(self, call: Call):
+        wall = time.perf_counter() - call.started
+        cpu = time.process_time() - call.cpu_started
+        read, written = io_counters()
+        rss = current_rss()
+        with self.lock:
+            # Enclosing calls are still active and share the same peak.
+            for active in self.active:
+                active.peak_rss = max(active.peak_rss, rss)
+            self.active.remove(call)
+            stats = self.functions.setdefault(call.name, {metric: 0 for metric in METRICS})
+            stats["calls"] += 1
+            stats["wall_s"] += wall
+            stats["cpu_s"] += cpu
+            stats["peak_rss_mb"] = max(stats["peak_rss_mb"], call.peak_rss / 2**20)
+            stats["rows_in"] += call.rows_in or 0
+            stats["rows_out"] += call.rows_out or 0
+            if read is not None and call.read_started is not None:
+                stats["read_mb"] += (read - call.read_started) / 2**20
+                stats["written_mb"] += (written - call.written_started) / 2**20
+
+    def _ensure_sampler(self):
+        if self.sampler is None:
+            self.sampler = threading.Thread(target=self._sample_rss, daemon=True)
+            self.sampler.start()
+
+    def _sample_rss(self):
+        # ru_maxrss is a process-wide high-water mark, so the peak of a single
+        # function is tracked by polling the current RSS while it runs.
+        while True:
+            time.sleep(RSS_SAMPLE_SECONDS)
+            rss = current_rss()
+            with self.lock:
+                for call in self.active:
+                    call.peak_rss = max(call.peak_rss, rss)
+
+    def to_dict(self):
+        return {
+            "stage": self.stage,
+            "argv": sys.argv,
+            "started_at": self.started_at,
+            "duration_s": time.time() - self.started_at,
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "functions": {
+                name: {metric: round(value, 6) for metric, value in stats.items()}
+                for name, stats in self.functions.items()
+            },
+        }
+
+
+class StackSampler:
+    # Minimal sampling profiler: records the stack of one thread at a fixed
+    # interval and writes folded stacks plus an SVG flamegraph.
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(STACK_SAMPLE_SECONDS):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def save(self, path: str):
+        with open(f"{path}.folded", "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(f"{path}.svg", "w") as f:
+            f.write(render_flamegraph(self.stacks))
+
+
+def render_flamegraph(stacks: Counter, width: int = 1200, row_height: int = 16):
+    root = {"count": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(frame, {"count": 0, "children": {}})
+            node["count"] += count
+
+    rects, max_depth = [], 0
+    total = max(root["count"], 1)
+
+    def layout(node, x, depth):
+        nonlocal max_depth
+        for name, child in node["children"].items():
+            w = child["count"] / total * width
+            if w >= 0.5:
+                rects.append((x, depth, w, name, child["count"]))
+                max_depth = max(max_depth, depth)
+                layout(child, x, depth + 1)
+            x += w
+
+    layout(root, 0.0, 0)
+    height = (max_depth + 1) * row_height
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" font-size="11">']
+    for x, depth, w, name, count in rects:
+        y = height - (depth + 1) * row_height
+        hue = 20 + zlib.crc32(name.encode()) % 40
+        label = html.escape(name)
+        chars = int(w / 7)
+        if len(name) <= chars:
+            text = label
+        elif chars > 3:
+            text = html.escape(name[:chars - 2]) + ".."
+        else:
+            text = ""
+        parts.append(
+            f'<g><title>{label} ({count} samples, {count / total:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" fill="hsl({hue},90%,60%)"/>'
+            f'<text x="{x + 2:.1f}" y="{y + row_height - 4}">{text}</text></g>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def run_dir(run: str = None):
+    return os.path.join(PROFILE_DIR, run or PROFILE_RUN)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_stages(directory: str):
+    stages = {}
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith(".json") and file_name != "report.json":
+            with open(os.path.join(directory, file_name)) as f:
+                stage = json.load(f)
+            stages[stage["stage"]] = stage
+    return stages
+
+
+def build_report(directory: str):
+    stages = load_stages(directory)
+    report = {
+        "run": os.path.basename(os.path.normpath(directory)),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "stages": stages,
+    }
+    with open(os.path.join(directory, "report.json"), "w") as f:
+        json.dump(report, f, indent=4)
+    with open(os.path.join(directory, "report.html"), "w") as f:
+        f.write(render_html(report))
+    return report
+
+
+def render_html(report: dict):
+    rows = []
+    for stage in report["stages"].values():
+        functions = sorted(stage["functions"].items(), key=lambda item: -item[1]["wall_s"])
+        slowest = max([stats["wall_s"] for _, stats in functions] or [1.0]) or 1.0
+        rows.append(
+            f'<tr class="stage"><td colspan="{len(METRICS) + 1}">{html.escape(stage["stage"])}'
+            f' &mdash; {stage["duration_s"]:.2f}s, max RSS {stage["max_rss_mb"]:.0f} MB</td></tr>'
+        )
+        for name, stats in functions:
+            bar = stats["wall_s"] / slowest * 100
+            cells = "".join(
+                f"<td>{stats[metric]:,.3f}</td>" if isinstance(stats[metric], float) else f"<td>{stats[metric]:,}</td>"
+                for metric in METRICS
+            )
+            rows.append(
+                f'<tr><td><div class="bar" style="width:{bar:.0f}%"></div>{html.escape(name)}</td>{cells}</tr>'
+            )
+    header = "".join(f"<th>{metric}</th>" for metric in METRICS)
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Pipeline profile {html.escape(report["run"])}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+td, th {{ padding: 4px 10px; text-align: right; border-bottom: 1px solid #ddd; }}
+td:first-child, th:first-child {{ text-align: left; position: relative; min-width: 260px; }}
+tr.stage td {{ text-align: left; font-weight: bold; background: #f3f3f3; }}
+.bar {{ position: absolute; left: 0; top: 2px; bottom: 2px; background: #ffd7a8; z-index: -1; }}
+</style></head><body>
+<h1>Pipeline profile: {html.escape(report["run"])}</h1>
+<p>git {html.escape(str(report["git_revision"]))}, Python {report["python"]}, host {html.escape(report["host"])}.
+Times, memory and I/O are inclusive of nested profiled calls.</p>
+<table><tr><th>function</th>{header}</tr>
+{"".join(rows)}
+</table></body></html>
+"""
+
+
+def compare_runs(baseline_dir: str, current_dir: str, threshold: float = 0.2):
+    baseline, current = load_stages(baseline_dir), load_stages(current_dir)
+    regressions = []
+    for stage_name, stage in current.items():
+        old_functions = baseline.get(stage_name, {}).get("functions", {})
+        for name, stats in stage["functions"].items():
+            old = old_functions.get(name)
+            if old is None:
+                print(f"{stage_name}.{name}: new, {stats['wall_s']:.3f}s")
+                continue
+            for metric in ("wall_s", "cpu_s", "peak_rss_mb"):
+                if old[metric] <= 0:
+                    continue
+                change = stats[metric] / old[metric] - 1
+                flag = " REGRESSION" if change > threshold else ""
+                print(f"{stage_name}.{name} {metric}: {old[metric]:.3f} -> {stats[metric]:.3f} ({change:+.1%}){flag}")
+                if flag:
+                    regressions.append((stage_name, name, metric))
+    return regressions
+
+
+_stages = {}
+
+
+def _save_stage(profile: StageProfile):
+    try:
+        directory = run_dir()
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{profile.stage}.json"), "w") as f:
+            json.dump(profile.to_dict(), f, indent=4)
+        build_report(directory)
+        logger.debug("Profile report written to %s", os.path.abspath(directory))
+    except Exception as e:
+        logger.error("Failed to write profile report %s", e)
+
+
+def get_stage(stage: str):
+    profile = _stages.get(stage)
+    if profile is None:
+        profile = _stages[stage] = StageProfile(stage)
+        atexit.register(_save_stage, profile)
+    return profile
+
+
+def profiler(stage: str):
+    """Return a decorator that profiles functions of the given pipeline stage.
+
+    Rows in are taken from the first positional argument with a length
+    (DataFrame, array or list), rows out from the return value.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = get_stage(stage)
+            rows_in = next((n for n in map(row_count, args) if n is not None), None)
+            call = profile.begin(func.__name__, rows_in)
+            sampler = None
+            if func.__name__ in FLAMEGRAPH_FUNCTIONS:
+                sampler = StackSampler(threading.get_ident())
+                sampler.start()
+            try:
+                result = func(*args, **kwargs)
+                call.rows_out = row_count(result)
+                return result
+            finally:
+                profile.end(call)
+                if sampler is not None:
+                    sampler.stop()
+                    os.makedirs(run_dir(), exist_ok=True)
+                    sampler.save(os.path.join(run_dir(), f"{stage}.{func.__name__}"))
+        return wrapper
+    return decorator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or compare pipeline profile reports.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("report", help="Rebuild report.json/report.html for a run")
+    report_parser.add_argument("run_dir")
+    compare_parser = subparsers.add_parser("compare", help="Compare two runs function by function")
+    compare_parser.add_argument("baseline_dir")
+    compare_parser.add_argument("current_dir")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.command == "report":
+        build_report(args.run_dir)
+    elif compare_runs(args.baseline_dir, args.current_dir, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
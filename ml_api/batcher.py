@@ -0,0 +1,101 @@
+import asyncio
+import time
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size: int = 32, max_wait_ms: float = 2.0, on_batch=None):
+        self.predict_fn = predict_fn
+        self.on_batch = on_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+
+        self.queue = None
+        self.task = None
+
+        self.batches = 0
+        self.items = 0
+        self.fill_counts = [0] * (self.max_batch_size + 1)
+        self.last_batch_size = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def submit(self, row: np.ndarray):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((row, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+
+        while len(batch) < self.max_batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+        # Only hold the window open while we are under concurrent load,
+        # so a lone request is never delayed.
+        if self.last_batch_size <= 1 and len(batch) == 1:
+            return batch
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            rows = np.vstack([row for row, _ in batch])
+
+            self.batches += 1
+            self.items += len(batch)
+            self.fill_counts[len(batch)] += 1
+            self.last_batch_size = len(batch)
+
+            started = time.perf_counter()
+            try:
+                proba = await loop.run_in_executor(None, self.predict_fn, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            if self.on_batch is not None:
+                self.on_batch(len(batch), time.perf_counter() - started)
+
+            for (_, future), p in zip(batch, proba):
+                if not future.done():
+                    future.set_result(p)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "mean_fill": self.items / (self.batches * self.max_batch_size) if self.batches else 0.0,
+            "batch_size_histogram": {
+                str(size): count for size, count in enumerate(self.fill_counts) if count
+            },
+        }
@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict, defaultdict
+
+
+class PairCache:
+    # LRU keyed by (fighter1, fighter2, ...) tuples that can drop every entry
+    # involving a given fighter without scanning the whole cache.
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.by_name = defaultdict(set)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key: tuple):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            for name in key[:2]:
+                self.by_name[name].add(key)
+            while len(self.entries) > self.maxsize:
+                old_key, _ = self.entries.popitem(last=False)
+                self._unlink(old_key)
+
+    def _unlink(self, key: tuple):
+        for name in key[:2]:
+            keys = self.by_name.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_name[name]
+
+    def invalidate(self, names):
+        removed = 0
+        with self.lock:
+            for name in names:
+                for key in list(self.by_name.get(name, ())):
+                    if self.entries.pop(key, None) is not None:
+                        removed += 1
+                    self._unlink(key)
+        return removed
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_name.clear()
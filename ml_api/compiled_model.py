@@ -0,0 +1,173 @@
+import copy
+
+import numpy as np
+
+CHUNK_ROWS = 1024
+
+# Pure-NumPy evaluator for the model.npz artifact written by
+# ml/src/model/model_export.py; see that file for the array layout.
+
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+class TreeEnsemble:
+    def __init__(self, arrays: dict, kind: str):
+        self.kind = kind
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        # children[2 * node + went_left] -> next node, so a step is one gather.
+        self.children = np.stack([self.right, self.left], axis=1).ravel()
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.depth = int(arrays["depth"])
+        self.base = float(arrays["base"])
+        # restrict() folds constant trees into base, so "mean" still divides
+        # by the original number of trees.
+        self.n_trees = int(arrays.get("n_trees", len(self.roots)))
+        # Inputs are compared in the precision the source library uses.
+        self.dtype = np.dtype(str(arrays.get("dtype", "float32")))
+
+    def _leaves(self, X: np.ndarray):
+        flat = X.ravel()
+        offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = flat[offsets + self.feature[node]] <= self.threshold[node]
+            node = self.children[2 * node + go_left]
+        return node
+
+    def leaves(self, X: np.ndarray):
+        X = np.ascontiguousarray(X, dtype=self.dtype)
+        if len(X) <= CHUNK_ROWS:
+            return self._leaves(X)
+        return np.vstack([self._leaves(X[s:s + CHUNK_ROWS]) for s in range(0, len(X), CHUNK_ROWS)])
+
+    def raw(self, X: np.ndarray):
+        total = self.value[self.leaves(X)].sum(axis=1) + self.base
+        if self.kind == "mean":
+            return total / self.n_trees
+        return total
+
+    def restrict(self, x: np.ndarray, free: list):
+        """Specialise the ensemble to rows equal to x outside the `free`
+        columns. Splits on the other features always go the same way, so
+        they are jumped over, and trees that never reach a free split are
+        folded into base. Predictions for such rows are unchanged."""
+        x = np.asarray(x, dtype=self.dtype)
+        node = np.arange(len(self.feature), dtype=self.left.dtype)
+        leaf = self.left == node
+        fixed = ~leaf & ~np.isin(self.feature, free)
+        went_left = x[self.feature] <= self.threshold
+        target = np.where(fixed, np.where(went_left, self.left, self.right), node)
+        # Pointer jumping: after k rounds every chain of up to 2**k fixed
+        # nodes ends on a free split or a leaf.
+        for _ in range(self.depth.bit_length()):
+            target = target[target]
+
+        left, right = target[self.left], target[self.right]
+        roots = target[self.roots]
+        active = ~leaf[roots]
+
+        # Keep only the reachable nodes, so the walk touches a few small
+        # arrays, and count the most free splits on any path (new depth).
+        depth, frontier = 0, np.unique(roots[active])
+        reached = [frontier]
+        while len(frontier):
+            depth += 1
+            children = np.concatenate([left[frontier], right[frontier]])
+            reached.append(children)
+            frontier = np.unique(children[~leaf[children]])
+        keep = np.unique(np.concatenate(reached))
+
+        def renumber(nodes):
+            return np.searchsorted(keep, nodes).astype(self.left.dtype)
+
+        return TreeEnsemble({
+            "feature": self.feature[keep], "threshold": self.threshold[keep],
+            "left": renumber(left[keep]), "right": renumber(right[keep]), "value": self.value[keep],
+            "roots": renumber(roots[active]), "depth": depth,
+            "base": self.base + self.value[roots[~active]].sum(), "n_trees": self.n_trees,
+            "dtype": self.dtype.name,
+        }, self.kind)
+
+    def predict(self, X: np.ndarray):
+        raw = self.raw(X)
+        return raw if self.kind == "mean" else sigmoid(raw)
+
+
+class CompiledEnsemble:
+    def __init__(self, arrays: dict):
+        self.feature_names_in_ = arrays["feature_names"]
+        self.classes_ = arrays["classes"]
+        self.meta_coef = arrays["meta_coef"]
+        self.meta_intercept = float(arrays["meta_intercept"])
+        self.estimator_names = [str(n) for n in arrays["estimator_names"]]
+
+        self.estimators = []
+        for i, kind in enumerate(arrays["estimator_kinds"]):
+            prefix = f"est{i}_"
+            est_arrays = {k[len(prefix):]: v for k, v in arrays.items() if k.startswith(prefix)}
+            # Artifacts exported before dtype was stored.
+            est_arrays.setdefault("dtype", "float64" if self.estimator_names[i] == "lightgbm" else "float32")
+            self.estimators.append(TreeEnsemble(est_arrays, str(kind)))
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def base_predictions(self, X: np.ndarray):
+        return np.column_stack([est.predict(X) for est in self.estimators])
+
+    def restrict(self, x: np.ndarray, features: list):
+        """Copy of the model that is exact (and much cheaper) for rows equal
+        to x except in the named features, e.g. a sensitivity grid around
+        one matchup."""
+        names = [str(name) for name in self.feature_names_in_]
+        free = [names.index(feature) for feature in features]
+        x = np.asarray(x, dtype=np.float64).ravel()
+        restricted = copy.copy(self)
+        restricted.estimators = [est.restrict(x, free) for est in self.estimators]
+        return restricted
+
+    def split_points(self, column: int):
+        return np.unique(np.concatenate([
+            est.threshold[(est.feature == column) & (est.left != np.arange(len(est.left)))]
+            for est in self.estimators
+        ]))
+
+    def predict_proba_varying(self, X: np.ndarray, features: list):
+        """predict_proba for rows that differ only in the named features.
+
+        Scores the restricted model, and only once per distinct combination
+        of split intervals: values between the same two split points take
+        the same path through every tree. Exact, and the cost is bounded by
+        the number of intervals rather than the number of rows.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        restricted = self.restrict(X[0], features)
+        names = [str(name) for name in self.feature_names_in_]
+        columns = [names.index(feature) for feature in features]
+        if not columns:
+            return np.repeat(restricted.predict_proba(X[:1]), len(X), axis=0)
+
+        # Binned in every input precision the trees use: rounding to float32
+        # can move a value onto the other side of a split point.
+        dtypes = {est.dtype for est in self.estimators}
+        bins = np.column_stack([
+            np.searchsorted(restricted.split_points(c), X[:, c].astype(dtype)) for c in columns for dtype in dtypes
+        ])
+        _, first, inverse = np.unique(bins, axis=0, return_index=True, return_inverse=True)
+        return restricted.predict_proba(X[first])[inverse.ravel()]
+
+    def predict_proba(self, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float64)
+        p = sigmoid(self.base_predictions(X) @ self.meta_coef + self.meta_intercept)
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X: np.ndarray):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,115 @@
+import copy
+
+import numpy as np
+
+from compiled_model import CHUNK_ROWS, CompiledEnsemble, TreeEnsemble, sigmoid
+
+# Per-feature attributions for the compiled ensemble, in log-odds of the
+# stacked prediction: base + sum(contributions) == logit(P(fighter1 wins)).
+#
+# Within a tree every split credits its feature with the change in node value
+# along the sample's path (Saabas), which needs the internal node values from
+# model.npz. Booster contributions live in margin space and are scaled onto
+# the estimator's probability, then weighted by the meta-model coefficients.
+
+
+def path_contributions(est: TreeEnsemble, X: np.ndarray, n_features: int):
+    X = np.ascontiguousarray(X, dtype=est.dtype)
+    n = len(X)
+    flat = X.ravel()
+    offsets = (np.arange(n) * X.shape[1])[:, None]
+    slots = (np.arange(n) * n_features)[:, None]
+    contributions = np.zeros(n * n_features)
+    node = np.broadcast_to(est.roots, (n, len(est.roots)))
+    for _ in range(est.depth):
+        feature = est.feature[node]
+        child = est.children[2 * node + (flat[offsets + feature] <= est.threshold[node])]
+        # Leaves point to themselves, so finished paths add zeros.
+        contributions += np.bincount((slots + feature).ravel(), weights=(est.value[child] - est.value[node]).ravel(),
+                                     minlength=n * n_features)
+        node = child
+    return contributions.reshape(n, n_features)
+
+
+class Explainer:
+    def __init__(self, model: CompiledEnsemble):
+        self.model = model
+        self.feature_names = [str(name) for name in model.feature_names_in_]
+        # What each estimator predicts before any split: its root values.
+        self.bias = [est.base + est.value[est.roots].sum() for est in model.estimators]
+        bias_proba = [
+            bias / est.n_trees if est.kind == "mean" else sigmoid(bias)
+            for est, bias in zip(model.estimators, self.bias)
+        ]
+        self.base = float(np.dot(model.meta_coef, bias_proba) + model.meta_intercept)
+
+    def _explain(self, X: np.ndarray):
+        contributions = np.zeros((len(X), len(self.feature_names)))
+        for est, bias, coef in zip(self.model.estimators, self.bias, self.model.meta_coef):
+            raw = path_contributions(est, X, len(self.feature_names))
+            if est.kind == "mean":
+                raw /= est.n_trees
+            else:
+                # Share the change in probability from the bias to the final
+                # margin out in proportion to the margin contributions.
+                shift = raw.sum(axis=1)
+                proba = sigmoid(bias + shift)
+                flat = np.abs(shift) < 1e-12
+                scale = np.where(flat, proba * (1 - proba), (proba - sigmoid(bias)) / np.where(flat, 1, shift))
+                raw *= scale[:, None]
+            contributions += coef * raw
+        return contributions
+
+    def explain(self, X: np.ndarray):
+        """Return (contributions, logit) for every row of X; contributions
+        has one column per model feature and sums to logit - base."""
+        X = np.asarray(X, dtype=np.float64)
+        contributions = np.vstack([self._explain(X[s:s + CHUNK_ROWS]) for s in range(0, len(X), CHUNK_ROWS)])
+        return contributions, self.base + contributions.sum(axis=1)
+
+
+class PairAttributions:
+    # Attributions for every ordered pair of one roster snapshot, stored as
+    # float32 (fighters x fighters x features; ~1 MB for 121 fighters), so
+    # they still add up to the logit to ~1e-6. rows maps the snapshot's
+    # table rows onto the stored ones; -1 marks fighters without attributions.
+    def __init__(self, explainer: Explainer, roster):
+        self.roster = roster
+        table = roster.table
+        n = len(table)
+        self.rows = np.arange(n)
+        self.contributions = np.empty((n, n, len(explainer.feature_names)), dtype=np.float32)
+        self.probability = np.empty((n, n), dtype=np.float32)
+
+        rows = np.arange(n)
+        step = max(1, CHUNK_ROWS * 16 // max(n, 1))
+        for start in range(0, n, step):
+            first = np.repeat(rows[start:start + step], n)
+            second = np.tile(rows, len(first) // n)
+            contributions, logit = explainer.explain(table.batch_features(first, second))
+            self.contributions[first, second] = contributions
+            self.probability[first, second] = sigmoid(logit)
+
+    @property
+    def nbytes(self):
+        return self.contributions.nbytes + self.probability.nbytes
+
+    def carry_over(self, roster, changed):
+        """Return the attributions for a newer roster snapshot without
+        recomputing anything: pairs of fighters whose features did not change
+        reuse the stored values, pairs involving a changed or new fighter
+        are left out."""
+        index = {name: row for row, name in enumerate(self.roster.table.names)}
+        carried = copy.copy(self)
+        carried.roster = roster
+        carried.rows = np.array([
+            -1 if name in changed or name not in index else self.rows[index[name]]
+            for name in roster.table.names
+        ], dtype=np.int64)
+        return carried
+
+    def get(self, row1: int, row2: int):
+        row1, row2 = self.rows[row1], self.rows[row2]
+        if row1 < 0 or row2 < 0:
+            return None
+        return self.contributions[row1, row2].astype(np.float64), float(self.probability[row1, row2])
@@ -0,0 +1,67 @@
+import numpy as np
+
+FEATURE_ORDER = [
+    "height_diff", "reach_diff", "stance_matchup", "age_diff",
+    "slpm_diff", "stracc_diff", "sapm_diff", "strdef_diff",
+    "tdavg_diff", "tdacc_diff", "tddef_diff",
+    "subavg_diff","max_streak_diff", "cur_streak_diff"
+]
+
+
+def stat_columns(feature_names: list):
+    # "<stat>_diff" features come from the "<stat>" field of each fighter.
+    return ["stance" if name == "stance_matchup" else name.removesuffix("_diff") for name in feature_names]
+
+
+class FighterTable:
+    def __init__(self, fighters: list, feature_names: list = FEATURE_ORDER):
+        self.names = [f["name"] for f in fighters]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        # The model artifact decides the feature order (and whether optional
+        # features such as elo_diff are present). Per-fighter stats are laid
+        # out column-for-column with it, so a matchup is a row subtraction
+        # (plus the stance column fix-up below).
+        self.feature_names = list(feature_names)
+        self.stat_columns = stat_columns(self.feature_names)
+        self.stance_col = self.stat_columns.index("stance")
+
+        # float64 like the training frames: the boosters compare thresholds
+        # in double, so float32 inputs can flip splits near a threshold.
+        self.matrix = np.zeros((len(fighters), len(self.stat_columns)), dtype=np.float64)
+        self.missing = np.zeros(self.matrix.shape, dtype=bool)
+
+        for i, fighter in enumerate(fighters):
+            for j, col in enumerate(self.stat_columns):
+                value = fighter.get(col)
+                if value is None:
+                    self.missing[i, j] = True
+                else:
+                    self.matrix[i, j] = value
+
+        self.matrix.setflags(write=False)
+        self.missing.setflags(write=False)
+
+    def __len__(self):
+        return len(self.names)
+
+    def pair_features(self, row1: int, row2: int, out: np.ndarray = None):
+        if out is None:
+            out = np.empty((1, len(self.feature_names)), dtype=np.float64)
+        a, b = self.matrix[row1], self.matrix[row2]
+        np.subtract(a, b, out=out[0])
+        # Stance codes are single digits, so this equals int(str(s1) + str(s2))
+        # as used in training.
+        out[0, self.stance_col] = a[self.stance_col] * 10 + b[self.stance_col]
+        return out
+
+    def batch_features(self, rows1, rows2, out: np.ndarray = None):
+        rows1 = np.asarray(rows1, dtype=np.intp)
+        rows2 = np.asarray(rows2, dtype=np.intp)
+        if out is None:
+            out = np.empty((len(rows1), len(self.feature_names)), dtype=np.float64)
+        np.take(self.matrix, rows1, axis=0, out=out)
+        out -= self.matrix[rows2]
+        col = self.stance_col
+        out[:, col] = self.matrix[rows1, col] * 10 + self.matrix[rows2, col]
+        return out
@@ -0,0 +1,35 @@
+import gc
+import multiprocessing
+import os
+import shutil
+
+# Must be set before the app (and with it numpy/xgboost/lightgbm) is imported,
+# otherwise every worker starts one OpenMP thread per core and they fight.
+WORKER_THREADS = os.environ.get("MODEL_THREADS", "1")
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, WORKER_THREADS)
+
+# Workers write their metrics here so /metrics can report all of them.
+METRICS_DIR = os.environ.setdefault("METRICS_DIR", "/tmp/ufc-metrics")
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+timeout = 60
+
+# Load model.pkl and the fighter table once in the master; workers share the
+# pages copy-on-write after fork.
+preload_app = True
+
+
+def on_starting(server):
+    # Drop snapshots left over from a previous run.
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR)
+
+
+def when_ready(server):
+    # Move everything allocated during preload out of the GC's reach so
+    # collections in the workers don't touch (and copy) the shared pages.
+    gc.collect()
+    gc.freeze()
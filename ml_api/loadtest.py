@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+
+FIGHTERS_PATH = "./processed_fighterdata.json"
+
+
+def load_divisions(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        fighters = json.load(f)
+    divisions = defaultdict(list)
+    for fighter in fighters:
+        divisions[fighter.get("division")].append(fighter)
+    return {name: roster for name, roster in divisions.items() if len(roster) > 1}
+
+
+def sample_pairs(divisions: dict, n: int, seed: int, unknown_fraction: float = 0.0):
+    # Users pick two fighters from one division's ranking page; top-ranked
+    # fighters and close-ranked matchups come up far more often.
+    rng = random.Random(seed)
+    names = list(divisions)
+    sizes = [len(divisions[d]) for d in names]
+    pairs = []
+
+    for _ in range(n):
+        roster = divisions[rng.choices(names, weights=sizes)[0]]
+        ranks = [f.get("rating") or len(roster) for f in roster]
+        first = rng.choices(range(len(roster)), weights=[1 / r for r in ranks])[0]
+        others = [i for i in range(len(roster)) if i != first]
+        second = rng.choices(others, weights=[1 / (1 + abs(ranks[i] - ranks[first])) for i in others])[0]
+        pair = [roster[first]["name"], roster[second]["name"]]
+        if rng.random() < unknown_fraction:
+            pair[rng.randrange(2)] = "Unknown Fighter"
+        pairs.append(tuple(pair))
+    return pairs
+
+
+async def run_load(client: httpx.AsyncClient, pairs: list, concurrency: int, rate: float):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+    started = loop.time()
+
+    async def send(i: int, pair: tuple):
+        # In open-loop mode latency is measured from the scheduled send time,
+        # so queueing behind a slow server is not hidden (coordinated omission).
+        scheduled = started + i / rate if rate > 0 else None
+        if scheduled is not None:
+            await asyncio.sleep(max(0.0, scheduled - loop.time()))
+        async with semaphore:
+            t0 = scheduled if scheduled is not None else loop.time()
+            try:
+                r = await client.post("/predict", json={"fighter1": pair[0], "fighter2": pair[1]})
+                statuses[str(r.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(loop.time() - t0)
+
+    await asyncio.gather(*(send(i, pair) for i, pair in enumerate(pairs)))
+    return latencies, statuses, loop.time() - started
+
+
+def summarize(latencies: list, statuses: Counter, elapsed: float, config: dict):
+    ms = np.array(latencies) * 1000
+    ok = statuses.get("200", 0)
+    total = sum(statuses.values())
+    return {
+        "config": config,
+        "requests": total,
+        "errors": total - ok,
+        "error_rate": (total - ok) / total if total else 0.0,
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": float(ms.mean()),
+            "p50": float(np.percentile(ms, 50)),
+            "p95": float(np.percentile(ms, 95)),
+            "p99": float(np.percentile(ms, 99)),
+            "max": float(ms.max()),
+        },
+        "status_counts": dict(statuses),
+    }
+
+
+def compare(result: dict, baseline: dict, max_regression: float):
+    failures = []
+    for key in ("p50", "p95", "p99"):
+        old, new = baseline["latency_ms"][key], result["latency_ms"][key]
+        if new > old * (1 + max_regression):
+            failures.append(f"{key} latency {new:.2f}ms vs baseline {old:.2f}ms")
+    # Throughput is only meaningful when neither run was rate limited.
+    if baseline["config"]["rate"] == 0 and result["config"]["rate"] == 0:
+        old, new = baseline["throughput_rps"], result["throughput_rps"]
+        if new < old * (1 - max_regression):
+            failures.append(f"throughput {new:.1f}rps vs baseline {old:.1f}rps")
+    if result["error_rate"] > baseline["error_rate"] + 0.01:
+        failures.append(f"error rate {result['error_rate']:.3f} vs baseline {baseline['error_rate']:.3f}")
+    return failures
+
+
+async def main_async(args):
+    divisions = load_divisions(args.fighters)
+    pairs = sample_pairs(divisions, args.warmup + args.requests, args.seed, args.unknown_fraction)
+    warmup, pairs = pairs[:args.warmup], pairs[args.warmup:]
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+            await run_load(client, warmup, args.concurrency, 0)
+            return await run_load(client, pairs, args.concurrency, args.rate)
+
+    import main
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30) as client:
+            await run_load(client, warmup, args.concurrency, 0)
+            return await run_load(client, pairs, args.concurrency, args.rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the /predict endpoint.")
+    parser.add_argument("--url", help="Target a running server (e.g. http://localhost:8000) instead of main.app in-process")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=0, help="Open-loop arrival rate in req/s; 0 sends as fast as concurrency allows")
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--unknown-fraction", type=float, default=0.0, help="Share of requests with an unknown fighter name")
+    parser.add_argument("--fighters", default=FIGHTERS_PATH)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative latency/throughput regression")
+    args = parser.parse_args()
+
+    latencies, statuses, elapsed = asyncio.run(main_async(args))
+    config = {k: getattr(args, k) for k in ("url", "requests", "concurrency", "rate", "seed", "unknown_fraction")}
+    result = summarize(latencies, statuses, elapsed, config)
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for key in ("concurrency", "rate", "unknown_fraction"):
+            if baseline["config"][key] != config[key]:
+                print(f"WARNING: baseline {key}={baseline['config'][key]} differs from {config[key]}", file=sys.stderr)
+        failures = compare(result, baseline, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION: {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
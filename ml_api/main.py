@@ -1,76 +1,565 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import pickle
-import json
-import pandas as pd
+import time
+
+_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from typing import Literal
+from contextlib import asynccontextmanager
+from batcher import MicroBatcher
+from roster import RosterWatcher, load_roster, changed_fighters
+from cache import PairCache
+from compiled_model import CompiledEnsemble
+from explain import Explainer, PairAttributions
+from simulation import win_probability_matrix, simulate_bracket, simulate_round_robin
+from metrics import Registry, Counter, Gauge, Histogram, MetricsMiddleware, collect_process_memory
+import hashlib
+import logging
+import math
+import os
 import numpy as np
 
-with open("./model.pkl", "rb") as f:
-    model = pickle.load(f)
+STARTUP_TIMINGS = {"imports": time.perf_counter() - _started}
+
+logger = logging.getLogger('ml_api')
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+logger.addHandler(console_handler)
+
+MODEL_THREADS = int(os.environ.get("MODEL_THREADS", "1"))
+MODEL_PATH = os.environ.get("MODEL_PATH", "./model.npz" if os.path.exists("./model.npz") else "./model.pkl")
+
+def pin_model_threads(model, n_threads: int):
+    for estimator in [model, *getattr(model, "estimators_", [])]:
+        if "n_jobs" in estimator.get_params(deep=False):
+            estimator.set_params(n_jobs=n_threads)
+
+def file_digest(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+def load_model(path: str):
+    if path.endswith(".npz"):
+        return CompiledEnsemble.load(path)
+
+    # The pickled StackingClassifier drags in sklearn, XGBoost and LightGBM;
+    # only pay for those imports when no compiled artifact is available.
+    import pickle
+    with open(path, "rb") as f:
+        model = pickle.load(f)
+    pin_model_threads(model, MODEL_THREADS)
+    return model
+
+_t = time.perf_counter()
+model = load_model(MODEL_PATH)
+MODEL_VERSION = file_digest(MODEL_PATH)
+STARTUP_TIMINGS["model_load"] = time.perf_counter() - _t
+
+ROSTER_PATH = os.environ.get("ROSTER_PATH", "./processed_fighterdata.json")
+# Elo ratings live in the fight store; a .db roster carries them itself.
+RATINGS_PATH = os.environ.get("RATINGS_PATH", ROSTER_PATH if ROSTER_PATH.endswith(".db") else "")
+FEATURE_NAMES = [str(name) for name in model.feature_names_in_]
+if "elo_diff" in FEATURE_NAMES and not RATINGS_PATH:
+    raise RuntimeError(f"Model {MODEL_PATH} uses elo_diff; set RATINGS_PATH to the fight store")
+ROSTER_POLL_SECONDS = float(os.environ.get("ROSTER_POLL_SECONDS", "10"))
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICT_CACHE_MAX_AGE = int(os.environ.get("PREDICT_CACHE_MAX_AGE", "300"))
+SENSITIVITY_MAX_POINTS = int(os.environ.get("SENSITIVITY_MAX_POINTS", "10000"))
+EXPLAIN_CACHE_SIZE = int(os.environ.get("EXPLAIN_CACHE_SIZE", "10000"))
+# Opt-in: precompute attributions for every ordered pair of rosters up to
+# this size at startup (n^2 pairs at roughly 0.2ms each, all of it before the
+# first request). Off by default; pairs are explained on demand and cached.
+EXPLAIN_PRECOMPUTE_MAX_FIGHTERS = int(os.environ.get("EXPLAIN_PRECOMPUTE_MAX_FIGHTERS", "0"))
+
+_t = time.perf_counter()
+# Handlers read ROSTER once and use that snapshot throughout; a reload swaps
+# the whole object in one assignment.
+def load_current_roster():
+    return load_roster(ROSTER_PATH, RATINGS_PATH, FEATURE_NAMES)
+
+ROSTER = load_current_roster()
+STARTUP_TIMINGS["data_load"] = time.perf_counter() - _t
+
+PREDICTION_CACHE = PairCache(PREDICTION_CACHE_SIZE)
+
+# Attributions need the tree arrays, so only the compiled model is explained.
+explainer = Explainer(model) if isinstance(model, CompiledEnsemble) else None
+ATTRIBUTIONS = None
+EXPLAIN_CACHE = PairCache(EXPLAIN_CACHE_SIZE)
+
+# When enabled, computed once here, in the preloading master, so the workers
+# share the result copy-on-write instead of each redoing n^2 explanations
+# while serving. The compiled model is plain NumPy, so this is safe before fork.
+if explainer is not None and len(ROSTER.table) <= EXPLAIN_PRECOMPUTE_MAX_FIGHTERS:
+    _t = time.perf_counter()
+    ATTRIBUTIONS = PairAttributions(explainer, ROSTER)
+    STARTUP_TIMINGS["attributions"] = time.perf_counter() - _t
+    logger.info("Attributions for %d pairs precomputed in %.1fs (%.1f MB)", len(ROSTER.table) ** 2,
+                STARTUP_TIMINGS["attributions"], ATTRIBUTIONS.nbytes / 1e6)
+
+# Set by gunicorn.conf.py so /metrics covers every worker, not just the one
+# that answered the scrape.
+METRICS = Registry(os.environ.get("METRICS_DIR", ""))
+REQUESTS = METRICS.register(Counter(
+    "ufc_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status")))
+REQUEST_LATENCY = METRICS.register(Histogram(
+    "ufc_http_request_duration_seconds", "End-to-end HTTP request latency.", ("route",)))
+PREDICT_STAGES = METRICS.register(Histogram(
+    "ufc_predict_stage_duration_seconds", "Latency of each /predict stage.", ("stage",)))
+PREDICT_ERRORS = METRICS.register(Counter(
+    "ufc_predict_errors_total", "Rejected prediction requests by reason.", ("reason",)))
+BATCH_SIZE = METRICS.register(Histogram(
+    "ufc_predict_batch_size", "Rows per predict_proba micro-batch.", buckets=(1, 2, 4, 8, 16, 32, 64, 128)))
+BATCH_LATENCY = METRICS.register(Histogram(
+    "ufc_predict_batch_duration_seconds", "predict_proba time per micro-batch."))
+MODEL_INFO = METRICS.register(Gauge(
+    "ufc_model_info", "Model artifact in use.", ("version", "path")))
+MODEL_INFO.set(1, MODEL_VERSION, MODEL_PATH)
+ROSTER_INFO = METRICS.register(Gauge(
+    "ufc_roster_info", "Fighter roster snapshot in use.", ("version",)))
+ROSTER_INFO.set(1, ROSTER.version)
+ROSTER_RELOADS = METRICS.register(Counter(
+    "ufc_roster_reloads_total", "Roster reload attempts by result.", ("result",)))
+CACHE_REQUESTS = METRICS.register(Counter(
+    "ufc_prediction_cache_requests_total", "Prediction cache lookups by result.", ("result",)))
+CACHE_INVALIDATIONS = METRICS.register(Counter(
+    "ufc_prediction_cache_invalidations_total", "Prediction cache entries dropped by roster reloads."))
+EXPLAIN_REQUESTS = METRICS.register(Counter(
+    "ufc_explain_requests_total", "Explanations served by source.", ("source",)))
+METRICS.register(Gauge(
+    "ufc_process_memory_bytes", "Process memory usage.", ("kind",), collect=collect_process_memory))
+
+def observe_batch(size: int, seconds: float):
+    BATCH_SIZE.observe(size)
+    BATCH_LATENCY.observe(seconds)
+
+BATCH_MAX_SIZE = int(os.environ.get("PREDICT_BATCH_MAX_SIZE", "32"))
+BATCH_WAIT_MS = float(os.environ.get("PREDICT_BATCH_WAIT_MS", "2"))
 
-with open("./processed_fighterdata.json", "r", encoding="utf-8") as f:
-    FIGHTERS = json.load(f)
+batcher = MicroBatcher(model.predict_proba, BATCH_MAX_SIZE, BATCH_WAIT_MS, on_batch=observe_batch)
 
-FIGHTER_INDEX = {f["name"]: f for f in FIGHTERS}
+READY = False
+
+def swap_roster(roster):
+    global ROSTER, ATTRIBUTIONS
+    old = ROSTER
+    if roster.version == old.version:
+        return
+    changed = changed_fighters(old, roster)
+    if ATTRIBUTIONS is not None:
+        # Pairs with a changed fighter fall back to on-demand explanations.
+        ATTRIBUTIONS = ATTRIBUTIONS.carry_over(roster, changed)
+    ROSTER = roster
+    removed = PREDICTION_CACHE.invalidate(changed)
+    EXPLAIN_CACHE.invalidate(changed)
+
+    ROSTER_INFO.clear()
+    ROSTER_INFO.set(1, roster.version)
+    ROSTER_RELOADS.inc("success")
+    CACHE_INVALIDATIONS.inc(amount=removed)
+    logger.info("Roster %s -> %s: %d fighters changed, %d cached predictions dropped",
+                old.version, roster.version, len(changed), removed)
+
+roster_watcher = RosterWatcher(sorted({ROSTER_PATH, RATINGS_PATH} - {""}), ROSTER_POLL_SECONDS,
+                               load_current_roster, swap_roster, on_error=lambda: ROSTER_RELOADS.inc("error"))
 
 class PredictRequest(BaseModel):
     fighter1: str
     fighter2: str
 
-def get_fighter(name: str):
-    fighter = FIGHTER_INDEX.get(name)
-    if not fighter:
+class SimulationRequest(BaseModel):
+    format: Literal["bracket", "round_robin"] = "bracket"
+    n_simulations: int = Field(20000, ge=1, le=100000)
+    seed: int = 0
+    top_n: int | None = Field(None, ge=2, le=64)
+
+class FeatureSweep(BaseModel):
+    feature: str
+    # Either explicit values or an evenly spaced range; with relative=True
+    # they are offsets from the matchup's own value of the feature.
+    values: list[float] | None = Field(None, min_length=1, max_length=SENSITIVITY_MAX_POINTS)
+    start: float | None = None
+    stop: float | None = None
+    num: int = Field(50, ge=1, le=SENSITIVITY_MAX_POINTS)
+    relative: bool = False
+
+    @property
+    def size(self):
+        return len(self.values) if self.values is not None else self.num
+
+class SensitivityRequest(BaseModel):
+    fighter1: str
+    fighter2: str
+    sweeps: list[FeatureSweep] = Field(..., min_length=1, max_length=3)
+    # "curves": each feature is swept alone, the others stay at the matchup's
+    # values. "grid": every combination of the swept values.
+    mode: Literal["curves", "grid"] = "curves"
+
+def get_fighter(roster, name: str):
+    row = roster.resolve(name)
+    if row is None:
+        PREDICT_ERRORS.inc("unknown_fighter")
         raise HTTPException(status_code=400, detail=f"Fighter not found: {name}")
-    
-    for key in ["height", "reach", "age", "slpm", "sapm", "stracc", "strdef",
-                "tdavg", "tdacc", "tddef", "subavg", "max_streak", "cur_streak", "stance"]:
-        if key not in fighter:
-            fighter[key] = 0  
-    return fighter
-
-app = FastAPI()
-
-FEATURE_ORDER = [
-    "height_diff", "reach_diff", "stance_matchup", "age_diff",
-    "slpm_diff", "stracc_diff", "sapm_diff", "strdef_diff",
-    "tdavg_diff", "tdacc_diff", "tddef_diff",
-    "subavg_diff","max_streak_diff", "cur_streak_diff"
-]
-
-def build_features(f1, f2):
+    return row
+
+def prediction_etag(roster, row1: int, row2: int):
+    # A prediction depends only on the model and the two fighters' feature
+    # rows, so the validator survives roster reloads that touch other fighters.
+    digest = hashlib.blake2b(MODEL_VERSION.encode(), digest_size=12)
+    for row in (row1, row2):
+        name = roster.table.names[row]
+        digest.update(b"\0" + name.encode() + b"\0" + roster.digests[name])
+    return f'"{digest.hexdigest()}"'
+
+def etag_matches(if_none_match: str, etag: str):
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2).
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global READY
+    await batcher.start()
+    warmup_started = time.perf_counter()
+    # Warm up inside the worker, not in the preloading master: forking after
+    # OpenMP has spun up its thread pool can deadlock the children.
+    await batcher.submit(ROSTER.table.pair_features(0, len(ROSTER.table) - 1))
+    STARTUP_TIMINGS["warmup"] = time.perf_counter() - warmup_started
+    STARTUP_TIMINGS["total"] = time.perf_counter() - _started
+    logger.info("Startup timings (%s): %s", MODEL_PATH,
+                ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in STARTUP_TIMINGS.items()))
+    await roster_watcher.start()
+    await METRICS.start()
+    READY = True
+    yield
+    READY = False
+    await METRICS.stop()
+    await roster_watcher.stop()
+    await batcher.stop()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, requests=REQUESTS, latency=REQUEST_LATENCY)
+
+@app.exception_handler(RequestValidationError)
+async def count_validation_errors(request: Request, exc: RequestValidationError):
+    # Only prediction routes count towards ufc_predict_errors_total; other
+    # routes' 422s still show up in ufc_http_requests_total by route.
+    if getattr(request.scope.get("route"), "path", "").startswith("/predict"):
+        PREDICT_ERRORS.inc("validation")
+    return await request_validation_exception_handler(request, exc)
+
+async def predict_rows(roster, row1: int, row2: int):
+    looked_up = time.perf_counter()
+    name1, name2 = roster.table.names[row1], roster.table.names[row2]
+
+    proba = PREDICTION_CACHE.get((name1, name2))
+    if proba is not None:
+        CACHE_REQUESTS.inc("hit")
+    else:
+        CACHE_REQUESTS.inc("miss")
+        X_array = roster.table.pair_features(row1, row2)
+        built = time.perf_counter()
+        PREDICT_STAGES.observe(built - looked_up, "features")
+
+        try:
+            proba = await batcher.submit(X_array)
+        except Exception:
+            PREDICT_ERRORS.inc("model_error")
+            logger.exception("Prediction failed for %s vs %s", name1, name2)
+            raise
+        PREDICT_STAGES.observe(time.perf_counter() - built, "inference")
+
+        # Don't cache a result computed from a roster that was swapped out
+        # while we were waiting on the batch.
+        if roster is ROSTER:
+            PREDICTION_CACHE.put((name1, name2), proba)
+
+    pred = model.classes_[np.argmax(proba)]
+
     return {
-        "height_diff": f1["height"] - f2["height"],
-        "reach_diff": f1["reach"] - f2["reach"],
-        "stance_matchup": int(str(f1['stance']) + str(f2['stance'])),
-        "age_diff": f1["age"] - f2["age"],
-        "slpm_diff": f1["slpm"] - f2["slpm"],
-        "sapm_diff": f1["sapm"] - f2["sapm"],
-        "stracc_diff": f1["stracc"] - f2["stracc"],
-        "strdef_diff": f1["strdef"] - f2["strdef"],
-        "tdavg_diff": f1["tdavg"] - f2["tdavg"],
-        "tdacc_diff": f1["tdacc"] - f2["tdacc"],
-        "tddef_diff": f1["tddef"] - f2["tddef"],
-        "subavg_diff": f1["subavg"] - f2["subavg"],
-        "max_streak_diff": f1["max_streak"] - f2["max_streak"],
-        "cur_streak_diff": f1["cur_streak"] - f2["cur_streak"],
+        "winner": name1 if pred == 1 else name2,
+        "looser": name2 if pred == 1 else name1,
+        "confidence": float(max(proba))
     }
-    
+
 @app.post("/predict")
-def predict(req: PredictRequest):
-    f1 = get_fighter(req.fighter1)
+async def predict(req: PredictRequest, request: Request):
+    started = time.perf_counter()
+    PREDICT_STAGES.observe(started - getattr(request.state, "started", started), "parse")
+
+    roster = ROSTER
+    row1 = get_fighter(roster, req.fighter1)
+    row2 = get_fighter(roster, req.fighter2)
+    PREDICT_STAGES.observe(time.perf_counter() - started, "lookup")
+
+    return await predict_rows(roster, row1, row2)
 
-    f2 = get_fighter(req.fighter2)
+@app.get("/predict")
+async def predict_cacheable(request: Request, fighter1: str = Query(...), fighter2: str = Query(...)):
+    started = time.perf_counter()
+    PREDICT_STAGES.observe(started - getattr(request.state, "started", started), "parse")
 
-    X = build_features(f1, f2)
+    roster = ROSTER
+    row1 = get_fighter(roster, fighter1)
+    row2 = get_fighter(roster, fighter2)
+    PREDICT_STAGES.observe(time.perf_counter() - started, "lookup")
 
-    X_array = np.array([X[f] for f in FEATURE_ORDER]).reshape(1, -1)
+    etag = prediction_etag(roster, row1, row2)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={PREDICT_CACHE_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        CACHE_REQUESTS.inc("not_modified")
+        return Response(status_code=304, headers=headers)
 
-    pred = model.predict(X_array)[0]
-    
-    proba = model.predict_proba(X_array)[0]
+    return JSONResponse(await predict_rows(roster, row1, row2), headers=headers)
 
+@app.get("/predict/explain")
+def explain_prediction(fighter1: str = Query(...), fighter2: str = Query(...)):
+    if explainer is None:
+        raise HTTPException(status_code=501, detail="Explanations need the compiled model (model.npz)")
+    roster = ROSTER
+    table = roster.table
+    row1 = get_fighter(roster, fighter1)
+    row2 = get_fighter(roster, fighter2)
+    name1, name2 = table.names[row1], table.names[row2]
+
+    attributions = ATTRIBUTIONS
+    precomputed = None
+    if attributions is not None and attributions.roster is roster:
+        precomputed = attributions.get(row1, row2)
+    if precomputed is not None:
+        source = "precomputed"
+        contributions, probability = precomputed
+    else:
+        cached = EXPLAIN_CACHE.get((name1, name2))
+        if cached is not None:
+            source = "cache"
+            contributions, probability = cached
+        else:
+            source = "computed"
+            contributions, logit = explainer.explain(table.pair_features(row1, row2))
+            contributions, probability = contributions[0], float(1 / (1 + np.exp(-logit[0])))
+            if roster is ROSTER:
+                EXPLAIN_CACHE.put((name1, name2), (contributions, probability))
+    EXPLAIN_REQUESTS.inc(source)
+
+    features = table.pair_features(row1, row2)[0]
+    order = np.argsort(-np.abs(contributions))
     return {
-        "winner": req.fighter1 if pred == 1 else req.fighter2,
-        "looser": req.fighter2 if pred == 1 else req.fighter1,
-        "confidence": float(max(proba))
-    }
\ No newline at end of file
+        "fighter1": name1,
+        "fighter2": name2,
+        "model_version": MODEL_VERSION,
+        "roster_version": roster.version,
+        "probability": probability,
+        # Contributions are in log-odds that fighter1 wins and add up to
+        # logit(probability) - base: exactly when computed, up to float32
+        # rounding (~1e-6) when precomputed.
+        "base": explainer.base,
+        "contributions": [
+            {"feature": table.feature_names[i], "value": float(features[i]), "contribution": float(contributions[i])}
+            for i in order
+        ],
+        "source": source,
+    }
+
+@app.post("/divisions/{name}/simulate")
+def simulate_division(name: str, req: SimulationRequest):
+    started = time.perf_counter()
+    roster = ROSTER
+    fighters = roster.fighters
+
+    ranked = sorted(
+        (row for row, fighter in enumerate(fighters) if (fighter.get("division") or "").lower() == name.lower()),
+        key=lambda row: fighters[row].get("rating") or float("inf"),
+    )
+    if len(ranked) < 2:
+        raise HTTPException(status_code=404, detail=f"Division not found: {name}")
+
+    if req.format == "bracket":
+        size = req.top_n or 1 << (len(ranked).bit_length() - 1)
+        if size & (size - 1):
+            raise HTTPException(status_code=400, detail="Bracket size must be a power of two")
+    else:
+        size = req.top_n or len(ranked)
+    if size > len(ranked):
+        raise HTTPException(status_code=400, detail=f"Division has only {len(ranked)} ranked fighters")
+
+    rows = np.array(ranked[:size])
+    P = win_probability_matrix(model, roster.table, rows)
+    rng = np.random.default_rng(req.seed)
+    if req.format == "bracket":
+        odds = simulate_bracket(P, req.n_simulations, rng)
+    else:
+        odds = simulate_round_robin(P, req.n_simulations, rng)
+
+    results = [
+        {"name": roster.table.names[row], "rating": fighters[row].get("rating"), "title_odds": float(p)}
+        for row, p in zip(rows, odds)
+    ]
+    results.sort(key=lambda f: f["title_odds"], reverse=True)
+
+    return {
+        "division": name,
+        "format": req.format,
+        "n_simulations": req.n_simulations,
+        "seed": req.seed,
+        "model_version": MODEL_VERSION,
+        "roster_version": roster.version,
+        "fighters": results,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+
+def sweep_values(sweep: FeatureSweep, base: float):
+    if sweep.values is not None:
+        values = np.array(sweep.values, dtype=np.float64)
+    elif sweep.start is not None and sweep.stop is not None:
+        values = np.linspace(sweep.start, sweep.stop, sweep.num)
+    else:
+        raise HTTPException(status_code=400, detail=f"Sweep of {sweep.feature} needs values or start and stop")
+    return values + base if sweep.relative else values
+
+@app.post("/predict/sensitivity")
+def predict_sensitivity(req: SensitivityRequest):
+    started = time.perf_counter()
+    roster = ROSTER
+    table = roster.table
+    row1 = get_fighter(roster, req.fighter1)
+    row2 = get_fighter(roster, req.fighter2)
+
+    features = [sweep.feature for sweep in req.sweeps]
+    unknown = [feature for feature in features if feature not in table.feature_names]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown features: {', '.join(unknown)}")
+    if len(set(features)) != len(features):
+        raise HTTPException(status_code=400, detail="Each feature can be swept only once")
+
+    # Checked before any array is built.
+    sizes = [sweep.size for sweep in req.sweeps]
+    points = math.prod(sizes) if req.mode == "grid" else sum(sizes)
+    if points > SENSITIVITY_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"{points} grid points, at most {SENSITIVITY_MAX_POINTS} allowed")
+
+    base = table.pair_features(row1, row2)
+    columns = [table.feature_names.index(feature) for feature in features]
+    values = [sweep_values(sweep, base[0, col]) for sweep, col in zip(req.sweeps, columns)]
+
+    # The whole perturbation grid is one matrix in the model's feature order;
+    # row 0 is the matchup itself.
+    X = np.repeat(base, points + 1, axis=0)
+    if req.mode == "grid":
+        mesh = np.meshgrid(*values, indexing="ij")
+        for col, axis in zip(columns, mesh):
+            X[1:, col] = axis.ravel()
+    else:
+        offset = 1
+        for col, v in zip(columns, values):
+            X[offset:offset + len(v), col] = v
+            offset += len(v)
+
+    positive = int(np.flatnonzero(model.classes_ == 1)[0])
+    try:
+        if hasattr(model, "predict_proba_varying"):
+            proba = model.predict_proba_varying(X, features)[:, positive]
+        else:
+            proba = model.predict_proba(X)[:, positive]
+    except Exception:
+        PREDICT_ERRORS.inc("model_error")
+        logger.exception("Sensitivity failed for %s vs %s", req.fighter1, req.fighter2)
+        raise
+
+    result = {
+        "fighter1": table.names[row1],
+        "fighter2": table.names[row2],
+        "model_version": MODEL_VERSION,
+        "roster_version": roster.version,
+        "features": dict(zip(table.feature_names, base[0].tolist())),
+        # Probabilities are always that fighter1 wins.
+        "probability": float(proba[0]),
+        "mode": req.mode,
+        "points": points,
+    }
+    if req.mode == "grid":
+        result["grid"] = {
+            "features": features,
+            "values": [v.tolist() for v in values],
+            "probability": proba[1:].reshape(sizes).tolist(),
+        }
+    else:
+        curves, offset = [], 1
+        for feature, v in zip(features, values):
+            curves.append({"feature": feature, "values": v.tolist(), "probability": proba[offset:offset + len(v)].tolist()})
+            offset += len(v)
+        result["curves"] = curves
+    result["elapsed_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+@app.get("/fighters/search")
+def search_fighters(
+    q: str = Query(..., min_length=1, max_length=100),
+    division: str | None = None,
+    limit: int = Query(10, ge=1, le=50),
+):
+    results = ROSTER.search.search(q, division, limit)
+    return {
+        "query": q,
+        "results": [
+            {
+                "name": fighter["name"],
+                "nickname": fighter.get("nickname"),
+                "division": fighter.get("division"),
+                "rating": fighter.get("rating"),
+                "score": score,
+            }
+            for fighter, score in results
+        ],
+    }
+
+@app.get("/roster")
+def roster_info(response: Response):
+    roster = ROSTER
+    response.headers["ETag"] = roster.etag
+    return {
+        "version": roster.version,
+        "etag": roster.etag,
+        "path": roster.path,
+        "loaded_at": roster.loaded_at,
+        "fighters": len(roster.table),
+        "prediction_cache": {
+            "size": len(PREDICTION_CACHE),
+            "hits": PREDICTION_CACHE.hits,
+            "misses": PREDICTION_CACHE.misses,
+        },
+        "attributions_precomputed": ATTRIBUTIONS is not None and ATTRIBUTIONS.roster is roster,
+    }
+
+@app.get("/batching")
+def batching_stats():
+    return batcher.stats()
+
+@app.get("/metrics")
+def metrics():
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/startup")
+def startup_timings():
+    return {"model_path": MODEL_PATH, "timings": STARTUP_TIMINGS}
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    if not READY:
+        raise HTTPException(status_code=503, detail="Model is warming up")
+    return {"status": "ready"}
@@ -0,0 +1,276 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import resource
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(labels), value] for labels, value in self.values.items()]
+
+    def render(self, snapshots, per_process=False):
+        # Counters of every process add up, including workers that have
+        # exited, so the totals never go backwards.
+        values = {}
+        for _, snapshot in snapshots:
+            for labels, value in snapshot:
+                values[tuple(labels)] = values.get(tuple(labels), 0) + value
+        lines = self.header()
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames=(), collect=None):
+        super().__init__(name, help, labelnames)
+        self.values = {}
+        self.collect = collect
+
+    def set(self, value: float, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def snapshot(self):
+        if self.collect is not None:
+            self.collect(self)
+        with self.lock:
+            return [[list(labels), value] for labels, value in self.values.items()]
+
+    def render(self, snapshots, per_process=False):
+        # A gauge is a per-process reading: with several workers each one is
+        # reported under its own pid label.
+        labelnames = self.labelnames + ("pid",) if per_process else self.labelnames
+        values = {}
+        for pid, snapshot in snapshots:
+            for labels, value in snapshot:
+                values[tuple(labels) + ((str(pid),) if per_process else ())] = value
+        lines = self.header()
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{format_labels(labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value: float, *labels):
+        pos = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][pos] += 1
+            series[1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(labels), list(counts), total] for labels, (counts, total) in self.series.items()]
+
+    def render(self, snapshots, per_process=False):
+        series = {}
+        for _, snapshot in snapshots:
+            for labels, counts, total in snapshot:
+                merged = series.setdefault(tuple(labels), [[0] * len(counts), 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+        lines = self.header()
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{format_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}"
+                )
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def process_alive(pid: int):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    # With a directory every process (gunicorn worker) writes a snapshot of
+    # its metrics to <directory>/<pid>.json, and /metrics, whichever worker
+    # serves it, renders the sum over all of them. Without one the registry
+    # only reports the current process.
+    def __init__(self, directory: str = "", interval: float = 1.0):
+        self.metrics = []
+        self.directory = directory
+        self.interval = interval
+        self.task = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def flush(self):
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        # Write-then-rename so readers never see a half-written file.
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def collect(self):
+        pid = os.getpid()
+        if not self.directory:
+            return [(pid, self.snapshot())], [pid]
+        self.flush()
+        snapshots = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path) as f:
+                    snapshots.append((int(entry.name[:-5]), json.load(f)))
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable metrics snapshot %s", entry.path)
+        return snapshots, [p for p, _ in snapshots if process_alive(p)]
+
+    def render(self):
+        snapshots, alive = self.collect()
+        per_process = bool(self.directory)
+        lines = []
+        for metric in self.metrics:
+            pick = [(p, s.get(metric.name, [])) for p, s in snapshots]
+            if isinstance(metric, Gauge):
+                # Readings of exited workers are stale; only their counts stay.
+                pick = [(p, s) for p, s in pick if p in alive]
+            lines.extend(metric.render(pick, per_process))
+        return "\n".join(lines) + "\n"
+
+    async def start(self):
+        if self.directory and self.interval > 0:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Failed to write metrics snapshot to %s", self.directory)
+
+
+def collect_process_memory(gauge: Gauge):
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        gauge.set(rss, "resident")
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux.
+    gauge.set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, "max_resident")
+
+
+class MetricsMiddleware:
+    def __init__(self, app, requests: Counter, latency: Histogram):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        scope.setdefault("state", {})["started"] = started
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template, never the raw path, to keep cardinality bounded.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.requests.inc(route, scope["method"], str(status))
+            self.latency.observe(time.perf_counter() - started, route)
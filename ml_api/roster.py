@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from features import FEATURE_ORDER, FighterTable
+from search import FighterSearchIndex
+
+logger = logging.getLogger('ml_api')
+
+
+# Rating of fighters without a rated fight, as in ml/src/data/ratings.py.
+INITIAL_RATING = 1500.0
+
+
+class Roster:
+    def __init__(self, fighters: list, version: str, path: str, feature_names: list = FEATURE_ORDER):
+        self.fighters = fighters
+        self.table = FighterTable(fighters, feature_names)
+        self.search = FighterSearchIndex(fighters)
+        self.version = version
+        self.etag = f'"{version}"'
+        self.path = path
+        self.loaded_at = time.time()
+
+        # Fingerprint of what the model actually sees for each fighter, so a
+        # reload only invalidates fighters whose features changed.
+        self.digests = {
+            name: hashlib.blake2b(
+                self.table.matrix[row].tobytes() + self.table.missing[row].tobytes(), digest_size=8
+            ).digest()
+            for name, row in self.table.index.items()
+        }
+
+    def resolve(self, name: str):
+        row = self.table.index.get(name)
+        if row is None:
+            row = self.search.resolve(name)
+        return row
+
+
+ROSTER_QUERY = (
+    "SELECT name, nickname, division, rating, record, url, height, reach, stance, slpm, stracc, sapm, "
+    "strdef, tdavg, tdacc, tddef, subavg, cur_streak, max_streak, age "
+    "FROM fighters WHERE rating IS NOT NULL ORDER BY division, rating"
+)
+
+
+def read_fighter_store(path: str):
+    # Ranked fighters from the SQLite fight store (ml/src/data/fight_store.py),
+    # as processed_fighterdata.json records.
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+    try:
+        cursor = conn.execute(ROSTER_QUERY)
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    fighters = [{k: v for k, v in zip(columns, row) if v is not None} for row in rows]
+    return fighters, json.dumps(fighters, sort_keys=True).encode()
+
+
+def read_ratings(path: str, urls: list):
+    # Current Elo ratings maintained by ml/src/data/ratings.py, looked up by
+    # primary key for the roster's fighters only.
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+    try:
+        rows = conn.execute(
+            f"SELECT url, rating FROM ratings WHERE url IN ({', '.join('?' for _ in urls)})", urls
+        ).fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+
+def load_roster(path: str, ratings_path: str = None, feature_names: list = FEATURE_ORDER):
+    if path.endswith(".db"):
+        fighters, raw = read_fighter_store(path)
+    else:
+        with open(path, "rb") as f:
+            raw = f.read()
+        fighters = json.loads(raw)
+
+    if ratings_path:
+        ratings = read_ratings(ratings_path, sorted({f["url"] for f in fighters if f.get("url")}))
+        fighters = [dict(f, elo=ratings.get(f.get("url"), INITIAL_RATING)) for f in fighters]
+        # Ratings are part of the snapshot, so a rating change is a new version.
+        raw += json.dumps(sorted(ratings.items())).encode()
+
+    version = hashlib.sha256(raw).hexdigest()[:12]
+    return Roster(fighters, version, path, feature_names)
+
+
+def changed_fighters(old: Roster, new: Roster):
+    names = old.digests.keys() | new.digests.keys()
+    return {name for name in names if old.digests.get(name) != new.digests.get(name)}
+
+
+def file_signature(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class RosterWatcher:
+    # Polls every file the roster is built from and calls load() when any
+    # of them changes.
+    def __init__(self, paths: list, interval: float, load, on_change, on_error=None):
+        self.paths = paths
+        self.interval = interval
+        self.load = load
+        self.on_change = on_change
+        self.on_error = on_error
+        self.signature = self.current_signature()
+        self.task = None
+
+    def current_signature(self):
+        return tuple(file_signature(path) for path in self.paths)
+
+    async def start(self):
+        if self.interval > 0:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def check(self):
+        signature = self.current_signature()
+        if None in signature or signature == self.signature:
+            return False
+        # Remember the signature even if loading fails, so a broken file is
+        # reported once and retried only after it changes again.
+        self.signature = signature
+        try:
+            # Parsing and index building happen off the event loop; only the
+            # final swap runs on it.
+            roster = await asyncio.to_thread(self.load)
+        except Exception:
+            logger.exception("Failed to reload roster from %s", ", ".join(self.paths))
+            if self.on_error is not None:
+                self.on_error()
+            return False
+        self.on_change(roster)
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
@@ -0,0 +1,116 @@
+import bisect
+import heapq
+import re
+import unicodedata
+from collections import defaultdict
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Latin letters that NFKD does not split into a base letter plus a combining
+# mark (casefold() already turns ß into ss). Applied after casefold.
+TRANSLITERATION = str.maketrans({
+    "ł": "l", "ø": "o", "đ": "d", "ð": "d", "ħ": "h", "ı": "i", "ŀ": "l",
+    "ŧ": "t", "þ": "th", "æ": "ae", "œ": "oe", "ĸ": "k", "ŋ": "n",
+})
+
+# Score of each kind of hit; the best hit per fighter wins.
+EXACT_SCORE = 1.0
+NAME_PREFIX_SCORE = 0.9
+TOKEN_PREFIX_SCORE = 0.8
+NICKNAME_PREFIX_SCORE = 0.7
+FUZZY_WEIGHT = 0.6
+FUZZY_MIN_SIMILARITY = 0.4
+
+
+def normalize(text: str):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return NON_ALNUM.sub(" ", text.casefold().translate(TRANSLITERATION)).strip()
+
+
+def trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FighterSearchIndex:
+    def __init__(self, fighters: list):
+        self.fighters = fighters
+        self.divisions = [(f.get("division") or "").lower() for f in fighters]
+        self.by_name = {}
+
+        terms = []
+        for idx, fighter in enumerate(fighters):
+            name = normalize(fighter.get("name"))
+            nickname = normalize(fighter.get("nickname"))
+            self.by_name.setdefault(name, idx)
+
+            terms.append((name, idx, NAME_PREFIX_SCORE))
+            for token in name.split()[1:]:
+                terms.append((token, idx, TOKEN_PREFIX_SCORE))
+            if nickname:
+                terms.append((nickname, idx, NICKNAME_PREFIX_SCORE))
+                for token in nickname.split()[1:]:
+                    terms.append((token, idx, NICKNAME_PREFIX_SCORE))
+
+        terms.sort()
+        self.terms = [t[0] for t in terms]
+        self.term_ids = [t[1] for t in terms]
+        self.term_scores = [t[2] for t in terms]
+
+        self.term_gram_counts = []
+        self.postings = defaultdict(list)
+        for term_idx, term in enumerate(self.terms):
+            grams = trigrams(term)
+            self.term_gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(term_idx)
+
+    def resolve(self, name: str):
+        return self.by_name.get(normalize(name))
+
+    def _prefix_hits(self, query: str, allowed, scores: dict):
+        pos = bisect.bisect_left(self.terms, query)
+        while pos < len(self.terms) and self.terms[pos].startswith(query):
+            idx = self.term_ids[pos]
+            score = self.term_scores[pos]
+            if score == NAME_PREFIX_SCORE and self.terms[pos] == query:
+                score = EXACT_SCORE
+            if allowed(idx) and score > scores.get(idx, 0.0):
+                scores[idx] = score
+            pos += 1
+
+    def _fuzzy_hits(self, query: str, allowed, scores: dict):
+        grams = trigrams(query)
+        shared = defaultdict(int)
+        for gram in grams:
+            for term_idx in self.postings.get(gram, ()):
+                shared[term_idx] += 1
+
+        for term_idx, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.term_gram_counts[term_idx])
+            if similarity < FUZZY_MIN_SIMILARITY:
+                continue
+            idx = self.term_ids[term_idx]
+            score = FUZZY_WEIGHT * similarity
+            if allowed(idx) and score > scores.get(idx, 0.0):
+                scores[idx] = score
+
+    def search(self, query: str, division: str = None, limit: int = 10):
+        query = normalize(query)
+        if not query:
+            return []
+
+        if division:
+            division = division.lower()
+            allowed = lambda idx: self.divisions[idx] == division
+        else:
+            allowed = lambda idx: True
+
+        scores = {}
+        self._prefix_hits(query, allowed, scores)
+        if len(scores) < limit:
+            self._fuzzy_hits(query, allowed, scores)
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.fighters[idx], round(score, 4)) for idx, score in top]
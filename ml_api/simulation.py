@@ -0,0 +1,56 @@
+import numpy as np
+
+CHUNK_SIMULATIONS = 10000
+
+
+def win_probability_matrix(model, table, rows: np.ndarray):
+    n = len(rows)
+    first, second = np.nonzero(~np.eye(n, dtype=bool))
+    X = table.batch_features(rows[first], rows[second])
+    positive = int(np.flatnonzero(model.classes_ == 1)[0])
+    proba = model.predict_proba(X)[:, positive]
+
+    P = np.full((n, n), 0.5)
+    P[first, second] = proba
+    # The model is not exactly antisymmetric in fighter order; average both
+    # orderings so P[i, j] + P[j, i] == 1.
+    P = (P + 1 - P.T) / 2
+    np.fill_diagonal(P, 0.5)
+    return P
+
+
+def bracket_order(size: int):
+    # Standard seeding: 1 v 8, 4 v 5, 2 v 7, 3 v 6 for an 8-man bracket.
+    order = [0]
+    while len(order) < size:
+        order = [s for seed in order for s in (seed, 2 * len(order) - 1 - seed)]
+    return np.array(order)
+
+
+def simulate_bracket(P: np.ndarray, n_simulations: int, rng: np.random.Generator):
+    n = len(P)
+    titles = np.zeros(n, dtype=np.int64)
+    for done in range(0, n_simulations, CHUNK_SIMULATIONS):
+        chunk = min(CHUNK_SIMULATIONS, n_simulations - done)
+        field = np.tile(bracket_order(n), (chunk, 1))
+        while field.shape[1] > 1:
+            a, b = field[:, 0::2], field[:, 1::2]
+            field = np.where(rng.random(a.shape) < P[a, b], a, b)
+        titles += np.bincount(field[:, 0], minlength=n)
+    return titles / n_simulations
+
+
+def simulate_round_robin(P: np.ndarray, n_simulations: int, rng: np.random.Generator):
+    n = len(P)
+    first, second = np.triu_indices(n, k=1)
+    p = P[first, second]
+    titles = np.zeros(n, dtype=np.int64)
+    for done in range(0, n_simulations, CHUNK_SIMULATIONS):
+        chunk = min(CHUNK_SIMULATIONS, n_simulations - done)
+        winners = np.where(rng.random((chunk, len(p))) < p, first, second)
+        offsets = (np.arange(chunk) * n)[:, None]
+        wins = np.bincount((offsets + winners).ravel(), minlength=chunk * n).reshape(chunk, n)
+        # Break ties on wins uniformly at random.
+        champions = np.argmax(wins + rng.random(wins.shape) * 0.5, axis=1)
+        titles += np.bincount(champions, minlength=n)
+    return titles / n_simulations
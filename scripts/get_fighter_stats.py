@@ -22,17 +22,8 @@ adapter = HTTPAdapter(max_retries=retry_strategy)
 session.mount("http://", adapter)
 session.mount("https://", adapter)
 
-def get_fighter_info(url):
-    url = f"{url}"
-        
-    try:
-        response = session.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        print("Retry failed:", e)
-        return {}
-    
-    soup = BeautifulSoup(response.text, "html.parser")
+def parse_fighter_info(html: str):
+    soup = BeautifulSoup(html, "html.parser")
 
     stats = {
         "height": None,
@@ -89,6 +80,18 @@ def get_fighter_info(url):
             
     return stats
 
+def get_fighter_info(url):
+    url = f"{url}"
+        
+    try:
+        response = session.get(url, headers=headers, timeout=10)
+        response.raise_for_status()
+    except Exception as e:
+        print("Retry failed:", e)
+        return {}
+    
+    return parse_fighter_info(response.text)
+
 def main():
     with open("../web-app/data/fighterdata.json", "r", encoding="utf-8") as f:
         fighters = json.load(f)
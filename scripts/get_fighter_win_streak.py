@@ -22,15 +22,8 @@ session.mount("http://", adapter)
 session.mount("https://", adapter)
 
 
-def get_fighter_win_streak(fighter_url: str):
-    try:
-        r = session.get(fighter_url, headers=headers, timeout=10)
-        r.raise_for_status()
-    except:
-        return {"cur_streak": 0, "max_streak": 0}
-        print("Retry failed:", e)
-
-    soup = BeautifulSoup(r.text, "html.parser")
+def parse_fighter_win_streak(html: str):
+    soup = BeautifulSoup(html, "html.parser")
 
     rows = soup.select("table.b-fight-details__table tbody tr")
 
@@ -53,6 +46,16 @@ def get_fighter_win_streak(fighter_url: str):
         "cur_streak": cur,
         "max_streak": maxs,
     }
+
+def get_fighter_win_streak(fighter_url: str):
+    try:
+        r = session.get(fighter_url, headers=headers, timeout=10)
+        r.raise_for_status()
+    except Exception as e:
+        print("Retry failed:", e)
+        return {"cur_streak": 0, "max_streak": 0}
+
+    return parse_fighter_win_streak(r.text)
     
 def main():
     with open("../web-app/data/fighterdata_with_stats.json", "r", encoding="utf-8") as f:
@@ -0,0 +1,210 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
+
+from get_fighter_stats import session, headers, retry_strategy, parse_fighter_info
+from get_fighter_win_streak import parse_fighter_win_streak
+from data_processing import data_preprocessing
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ml", "src", "data"))
+import fight_store
+
+ROSTER_PATH = "../web-app/data/fighterdata.json"
+SNAPSHOT_PATH = "../web-app/data/processed_fighterdata.json"
+PUBLISH_PATHS = [
+    "../web-app/data/processed_fighterdata.json",
+    "../ml_api/processed_fighterdata.json",
+]
+VALIDATORS_PATH = ".roster_validators.json"
+
+
+class RateLimiter:
+    # Spaces out request starts across all worker threads.
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def load_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json_atomic(path: str, data, indent: int = 4):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def fetch_page(url: str, validators: dict, limiter: RateLimiter):
+    request_headers = dict(headers)
+    cached = validators.get(url, {})
+    if cached.get("etag"):
+        request_headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        request_headers["If-Modified-Since"] = cached["last_modified"]
+
+    limiter.wait()
+    response = session.get(url, headers=request_headers, timeout=10)
+    if response.status_code == 304:
+        return None, cached
+    response.raise_for_status()
+
+    new_validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    return response.text, new_validators
+
+
+def build_record(base: dict, html: str):
+    # One page carries both the career stats and the fight history, so the
+    # stats and win-streak passes no longer download it twice.
+    fighter = dict(base)
+    fighter.update(parse_fighter_info(html))
+    fighter.update(parse_fighter_win_streak(html))
+    return data_preprocessing([fighter])[0]
+
+
+def refresh_fighter(base: dict, previous: dict, validators: dict, limiter: RateLimiter):
+    url = base.get("url")
+    if not url:
+        return previous, None, "no url"
+
+    try:
+        html, new_validators = fetch_page(url, validators, limiter)
+    except Exception as e:
+        return previous, None, f"fetch failed: {e}"
+
+    if html is None:
+        if previous is None:
+            return None, None, "not modified but no previous record"
+        # Page unchanged; only ranking metadata from the roster may differ.
+        record = copy.deepcopy(previous)
+        record.update({k: base[k] for k in base if k in record})
+        return record, new_validators, None
+
+    try:
+        return build_record(base, html), new_validators, None
+    except Exception as e:
+        return previous, None, f"processing failed: {e}"
+
+
+def diff_record(old: dict, new: dict):
+    if old is None:
+        return sorted(new)
+    keys = old.keys() | new.keys()
+    return sorted(k for k in keys if old.get(k) != new.get(k))
+
+
+def record_key(fighter: dict):
+    # Keyed by name as well: a url shared by two roster entries (a record
+    # scraped from the wrong page) must not make one look like the other.
+    return fighter.get("url"), fighter.get("name")
+
+
+def duplicate_urls(roster: list):
+    names = {}
+    for fighter in roster:
+        if fighter.get("url"):
+            names.setdefault(fighter["url"], []).append(fighter["name"])
+    return {url: found for url, found in names.items() if len(found) > 1}
+
+
+def refresh(workers: int, interval: float, dry_run: bool):
+    roster = load_json(ROSTER_PATH, [])
+    snapshot = {record_key(f): f for f in load_json(SNAPSHOT_PATH, []) if f.get("url")}
+    validators = load_json(VALIDATORS_PATH, {})
+    limiter = RateLimiter(interval)
+
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda base: refresh_fighter(base, snapshot.get(record_key(base)), validators, limiter),
+            roster,
+        ))
+
+    published, changed_records, changes, failures = [], [], {}, {}
+    for base, (record, new_validators, error) in zip(roster, results):
+        if error:
+            failures[base["name"]] = error
+        if record is None:
+            continue
+        if new_validators:
+            validators[base["url"]] = new_validators
+
+        old = snapshot.get(record_key(base))
+        changed = diff_record(old, record)
+        # Keep untouched records byte-for-byte identical to the snapshot.
+        published.append(record if changed else old)
+        if changed:
+            changed_records.append(record)
+            changes[record["name"]] = changed
+
+    removed = set(snapshot) - {record_key(f) for f in roster}
+    for key in removed:
+        changes[snapshot[key]["name"]] = ["removed"]
+    # The store keeps one fighter per url, so only unrank urls that no
+    # remaining roster entry uses.
+    removed_urls = {url for url, _ in removed} - {f.get("url") for f in roster}
+
+    for name, fields in changes.items():
+        print(f"{name}: {', '.join(fields)}")
+    for name, error in failures.items():
+        print(f"FAILED {name}: {error}")
+    for url, names in duplicate_urls(roster).items():
+        print(f"DUPLICATE URL {url}: {', '.join(names)}")
+    print(f"{len(roster)} fighters checked, {len(changes)} changed, {len(failures)} failed")
+
+    if dry_run:
+        return changes
+    if changes:
+        for path in PUBLISH_PATHS:
+            write_json_atomic(path, published)
+        if os.path.exists(fight_store.DB_PATH):
+            conn = fight_store.connect()
+            try:
+                # Only touch changed rows, so updated_at keeps meaning "last
+                # changed"; removed fighters drop out of the served roster.
+                fight_store.upsert_fighters(conn, changed_records)
+                fight_store.unrank_fighters(conn, sorted(removed_urls))
+            finally:
+                conn.close()
+    write_json_atomic(VALIDATORS_PATH, validators, indent=2)
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh fighter stats and publish only changed records.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.5, help="Minimum seconds between request starts")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    refresh(args.workers, args.interval, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,40 @@
 import { NextResponse } from "next/server";
 
+const BACKEND_URL = "http://backend:8000/predict";
+
+export async function GET(req: Request) {
+  const { searchParams } = new URL(req.url);
+  const params = new URLSearchParams({
+    fighter1: searchParams.get("fighter1") ?? "",
+    fighter2: searchParams.get("fighter2") ?? "",
+  });
+
+  // Forward the validator so the backend can answer 304 without touching
+  // the model, and pass its caching headers through unchanged.
+  const headers: Record<string, string> = {};
+  const ifNoneMatch = req.headers.get("if-none-match");
+  if (ifNoneMatch) headers["If-None-Match"] = ifNoneMatch;
+
+  const res = await fetch(`${BACKEND_URL}?${params}`, { headers, cache: "no-store" });
+
+  const passthrough = new Headers();
+  for (const name of ["etag", "cache-control"]) {
+    const value = res.headers.get(name);
+    if (value) passthrough.set(name, value);
+  }
+
+  if (res.status === 304) {
+    return new Response(null, { status: 304, headers: passthrough });
+  }
+
+  const data = await res.json();
+  return NextResponse.json(data, { status: res.status, headers: passthrough });
+}
+
 export async function POST(req: Request) {
   const body = await req.json();
 
-  const res = await fetch("http://backend:8000/predict", {
+  const res = await fetch(BACKEND_URL, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(body),
@@ -37,14 +37,13 @@ export default function FighterPicker({
     setPrediction(null);
 
     try {
-      const res = await fetch("/api/predict", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          fighter1: fighter1name,
-          fighter2: fighter2name,
-        }),
+      // GET so the browser and any proxy can reuse (or revalidate) the
+      // response for a matchup that was already predicted.
+      const params = new URLSearchParams({
+        fighter1: fighter1name,
+        fighter2: fighter2name,
       });
+      const res = await fetch(`/api/predict?${params}`);
 
       const data = await res.json();
       setPrediction(data);